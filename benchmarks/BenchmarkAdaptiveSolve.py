@@ -0,0 +1,86 @@
+﻿"""
+Benchmark the adaptiveSolve driver against the fixed zombieSolve loop on loaded
+square cable networks (springs with anchored edges and nodal loads). Reports
+the iterations and wall time of both, why the adaptive solve stopped and the
+largest deviation of its particles from a solve run to a tight threshold.
+The stiff steel beams of BenchmarkNewtonSolve are solved too, against the
+Newton equilibrium, as their velocity sums rise and fall for many blocks
+before they converge.
+-
+Usage: python benchmarks/BenchmarkAdaptiveSolve.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessImplicit as hi
+from BenchmarkNewtonSolve import makeBeam
+
+def makeCableNet(n):
+    
+    """ Make the goals of a n by n grid cable network """
+    
+    x,y = np.meshgrid(np.arange(n + 1.0),np.arange(n + 1.0),indexing="ij")
+    pts = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1)
+    ids = np.arange(len(pts)).reshape(n + 1,n + 1)
+    edges = np.concatenate((np.stack((ids[:-1].ravel(),ids[1:].ravel()),axis=1),
+                            np.stack((ids[:,:-1].ravel(),ids[:,1:].ravel()),axis=1)))
+    boundary = (x.ravel() % n == 0) | (y.ravel() % n == 0)
+    loads = np.tile([0.0,0.0,-0.1],(np.count_nonzero(~boundary),1))
+    return [hg.SpringGroup(pts[edges[:,0]],pts[edges[:,1]],0.9,10.0),
+            hg.AnchorGroup(pts[boundary],1000.0),
+            hg.LoadGroup(pts[~boundary],loads)]
+
+if __name__ == "__main__":
+    
+    threshold = 1e-14
+    print("net      mode      iterations  seconds  stop         max deviation")
+    for n in (10,20,40,60):
+        
+        # Reference solve to a tight threshold
+        goals = makeCableNet(n)
+        ps,i = hs.zombieSolve(goals,threshold=1e-18,maxIterations=100000)
+        reference = ps.GetPositions()
+        
+        # Fixed loop
+        goals = makeCableNet(n)
+        t = time.perf_counter()
+        ps,i = hs.zombieSolve(goals,threshold=threshold,maxIterations=100000)
+        seconds = time.perf_counter() - t
+        deviation = np.abs(ps.GetPositions() - reference).max()
+        print("%-8s %-9s %-11d %-8.3f %-12s %.1e" % ("%dx%d" % (n,n),"zombie",i,seconds,"threshold",deviation))
+        
+        # Adaptive driver, stopping at the default move tolerance
+        goals = makeCableNet(n)
+        ps,i = hs.zombieSolve(goals,maxIterations=0)
+        t = time.perf_counter()
+        trace = hs.adaptiveSolve(ps,goals,maxIterations=100000,threshold=threshold)
+        seconds = time.perf_counter() - t
+        deviation = np.abs(ps.GetPositions() - reference).max()
+        print("%-8s %-9s %-11d %-8.3f %-12s %.1e" % ("%dx%d" % (n,n),"adaptive",trace.iterations,seconds,trace.reason,deviation))
+    
+    print("")
+    print("beam      sag   iterations  seconds  stop           converged  max deviation")
+    for segments,sag in ((20,0.25),(40,0.0),(80,0.25)):
+        
+        # Reference Newton solve
+        ps,goals = makeBeam(segments,sag)
+        hi.newtonSolve(ps,goals)
+        reference = ps.GetPositions()
+        
+        # Adaptive driver
+        ps,goals = makeBeam(segments,sag)
+        hs.indexGoals(goals,0.0001,ps)
+        t = time.perf_counter()
+        trace = hs.adaptiveSolve(ps,goals,maxIterations=20000)
+        seconds = time.perf_counter() - t
+        deviation = np.abs(ps.GetPositions() - reference).max()
+        print("%-9d %-5.2f %-11d %-8.3f %-14s %-10s %.1e" % (segments,sag,trace.iterations,seconds,trace.reason,trace.converged,deviation))
@@ -0,0 +1,74 @@
+﻿"""
+Benchmark making the angle goals of a cable network in batch from CSR
+adjacency arrays (HeadlessNetwork.angleGoals) against fitting a plane, sorting
+the neighbours and making the goals node by node like makeAngleGoals in
+RelaxCableNetworkIntoPlane, on perturbed grid networks.
+-
+Usage: python benchmarks/BenchmarkAngleGoals.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import math
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessGoals as hg
+import HeadlessNetwork as hn
+
+def makeNetwork(n,seed=0):
+    
+    """ Make the node points and edges of a n by n grid network with perturbed nodes """
+    
+    rng = np.random.default_rng(seed)
+    x,y = np.meshgrid(np.arange(n,dtype=np.float64),np.arange(n,dtype=np.float64),indexing="ij")
+    points = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1) + rng.normal(0.0,0.1,(x.size,3))
+    ids = np.arange(x.size).reshape(n,n)
+    edges = np.concatenate((np.stack((ids[:-1].ravel(),ids[1:].ravel()),axis=1),
+                            np.stack((ids[:,:-1].ravel(),ids[:,1:].ravel()),axis=1)))
+    return points,edges
+
+def loopAngleGoals(points,indptr,indices,strength):
+    
+    """ Make the angle goals node by node, fitting a plane to and sorting the neighbours of each """
+    
+    goals = []
+    for i in range(len(indptr) - 1):
+        neighbours = indices[indptr[i]:indptr[i + 1]]
+        if len(neighbours) < 2:
+            continue
+        neighbourPts = points[neighbours]
+        u,s,vt = np.linalg.svd(neighbourPts - neighbourPts.mean(axis=0))
+        yAxis = np.cross(vt[2],vt[0])
+        angles = [math.atan2((pt - points[i]).dot(yAxis),(pt - points[i]).dot(vt[0])) for pt in neighbourPts]
+        ordered = [neighbours[k] for k in np.argsort(angles)]
+        idealAngle = 2.0 * math.pi / len(ordered)
+        for k in range(len(ordered)):
+            goals.append(hg.AngleGroup([ordered[k]],[i],[ordered[(k + 1) % len(ordered)]],[i],idealAngle,strength))
+    return goals
+
+if __name__ == "__main__":
+    
+    maxLoopNodes = 40000
+    print("nodes     goals     loop(s)   batch(s)")
+    for n in (100,200,317):
+        points,edges = makeNetwork(n)
+        
+        # Batch, including building the adjacency
+        t = time.perf_counter()
+        indptr,indices,edgeIds = hn.csrAdjacency(edges,len(points))
+        group = hn.angleGoals(points,indptr,indices,1.0)
+        batchTime = time.perf_counter() - t
+        
+        # Node by node
+        if len(points) <= maxLoopNodes:
+            t = time.perf_counter()
+            loopAngleGoals(points,indptr,indices,1.0)
+            loopTime = "%7.3f" % (time.perf_counter() - t)
+        else:
+            loopTime = "skipped"
+        print("%-9d %-9d %s   %8.3f" % (len(points),group.Count,loopTime,batchTime))
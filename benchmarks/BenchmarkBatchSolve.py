@@ -0,0 +1,51 @@
+﻿"""
+Benchmark the throughput of HeadlessBatch.solveSweep with an increasing number
+of worker processes, on a sweep over the spring strength and load of a cable net.
+-
+Usage: python benchmarks/BenchmarkBatchSolve.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import multiprocessing
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessGoals as hg
+import HeadlessBatch as hb
+
+def makeCableNet(springStrength,load,n=20):
+    
+    """ Make a square cable net anchored at its boundary """
+    
+    # Make grid points and edges
+    x,y = np.meshgrid(np.arange(n + 1.0),np.arange(n + 1.0),indexing="ij")
+    pts = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1)
+    ids = np.arange(len(pts)).reshape(n + 1,n + 1)
+    edges = np.concatenate((np.stack((ids[:-1].ravel(),ids[1:].ravel()),axis=1),
+                            np.stack((ids[:,:-1].ravel(),ids[:,1:].ravel()),axis=1)))
+    
+    # Make goals
+    boundary = (x.ravel() % n == 0) | (y.ravel() % n == 0)
+    goals = [hg.SpringGroup(pts[edges[:,0]],pts[edges[:,1]],0.9,springStrength),
+             hg.AnchorGroup(pts[boundary],1000.0),
+             hg.LoadGroup(pts[~boundary],np.tile([0.0,0.0,-load],((~boundary).sum(),1)))]
+    return goals
+
+if __name__ == "__main__":
+    
+    parameterSets = hb.parameterGrid(springStrength=[10.0,50.0,100.0,500.0],load=[0.01,0.05,0.1,0.2])
+    cores = multiprocessing.cpu_count()
+    processCounts = sorted(set([1,2,4,8,16,cores]))
+    print("processes  jobs/s  speedup")
+    baseline = None
+    for processes in [p for p in processCounts if p <= cores]:
+        t = time.perf_counter()
+        results = list(hb.solveSweep(makeCableNet,parameterSets,maxIterations=2000,processes=processes))
+        throughput = len(results) / (time.perf_counter() - t)
+        baseline = baseline or throughput
+        print("%-10d %6.2f  %7.2f" % (processes,throughput,throughput / baseline))
@@ -0,0 +1,74 @@
+﻿"""
+Benchmark a solver step of the batch HeadlessCustomGoals.Spring (compiled with
+Numba when installed) against one-object-per-spring goals, the headless
+equivalent of the IronPython CustomKangaroo2Goal.Spring.
+-
+Usage: python benchmarks/BenchmarkCustomGoals.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessCustomGoals as cg
+
+class ObjectSpring(hg.GoalObject):
+    
+    """ One goal object per spring, written like CustomKangaroo2Goal.Spring """
+    
+    def __init__(self,start,end,restLength,stiffness):
+        
+        hg.GoalObject.__init__(self,[start,end],2 * stiffness)
+        self.RestLength = restLength
+        
+    def Calculate(self,p):
+        current = p[self.PIndex[1]] - p[self.PIndex[0]]
+        stretchfactor = 1.0 - self.RestLength / np.sqrt(current.dot(current))
+        springMove = 0.5 * current * stretchfactor
+        self.Move[0] = springMove
+        self.Move[1] = -springMove
+
+def timeStep(ps,goals,steps=3):
+    
+    """ Time the mean duration of a solver step """
+    
+    ps.Step(goals,False,0.0)
+    t = time.perf_counter()
+    for i in range(steps):
+        ps.Step(goals,False,0.0)
+    return (time.perf_counter() - t) / steps
+
+if __name__ == "__main__":
+    
+    maxObjectSprings = 100000
+    rng = np.random.default_rng(0)
+    print("Numba: %s" % (cg.numba is not None))
+    print("springs    objects(s/step)  batch(s/step)")
+    for count in (10000,100000,1000000):
+        
+        # Make random springs between shared particles
+        particles = rng.random((count // 2,3)) * 100.0
+        pairs = rng.integers(0,len(particles),(count,2))
+        pairs = pairs[pairs[:,0] != pairs[:,1]]
+        ps = hs.PhysicalSystem()
+        for pt in particles:
+            ps.AddParticle(pt)
+            
+        # Time batch springs
+        batch = cg.Spring(pairs[:,0],pairs[:,1],1.0,1.0)
+        batchTime = timeStep(ps,[batch])
+        
+        # Time one goal object per spring
+        if count <= maxObjectSprings:
+            objects = [ObjectSpring(int(a),int(b),1.0,1.0) for a,b in pairs]
+            objectTime = "%15.4f" % timeStep(ps,objects)
+        else:
+            objectTime = "        skipped"
+        print("%-10d %s  %13.4f" % (count,objectTime,batchTime))
@@ -0,0 +1,66 @@
+﻿"""
+Benchmark Jacobi (Step) against graph coloured Gauss-Seidel (GaussSeidelStep)
+iterations on long polylines, modelled as loaded beams with springs between
+consecutive vertices and angle goals between consecutive segments (as made by
+ShapingBeamGoals), anchored at both ends. Reports the iterations and wall time
+until the largest residual particle force drops below the tolerance.
+-
+Usage: python benchmarks/BenchmarkGaussSeidel.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessImplicit as hi
+
+def makeBeam(n,bending):
+    
+    """ Make the goals of a polyline beam with n segments """
+    
+    pts = np.stack((np.linspace(0.0,10.0,n + 1),np.zeros(n + 1),np.zeros(n + 1)),axis=1)
+    goals = [hg.SpringGroup(pts[:-1],pts[1:],9.0 / n,100.0),
+             hg.AnchorGroup(pts[[0,-1]],10000.0),
+             hg.LoadGroup(pts[1:-1],np.tile([0.0,0.0,-0.01],(n - 1,1)))]
+    if bending:
+        goals.append(hg.AngleGroup(pts[:-2],pts[1:-1],pts[1:-1],pts[2:],0.0,10.0))
+    return goals
+
+def timeSolve(goals,gaussSeidel,relaxation=1.5,tolerance=1e-6,maxIterations=20000,checkEvery=20):
+    
+    """ Solve until the residual drops below tolerance, returns iterations and seconds """
+    
+    ps = hs.PhysicalSystem()
+    ps.Relaxation = relaxation
+    ps.AssignPIndices(goals,0.0001)
+    t = time.perf_counter()
+    if gaussSeidel:
+        batches = hs.colourGoals(goals,ps.ParticleCount())
+    for i in range(1,maxIterations + 1):
+        if gaussSeidel:
+            ps.GaussSeidelStep(batches,0.0)
+        else:
+            ps.Step(goals,False,0.0)
+        if i % checkEvery == 0:
+            seconds = time.perf_counter() - t
+            if np.abs(hi.calcResidual(goals,ps.GetPositions())).max() < tolerance:
+                return i,seconds
+            t = time.perf_counter() - seconds
+    return None,time.perf_counter() - t
+
+if __name__ == "__main__":
+    
+    print("segments  bending  mode                iterations  seconds")
+    for n in (50,100,200):
+        for bending in (False,True):
+            for name,gaussSeidel,relaxation in (("jacobi",False,1.0),("gauss-seidel",True,1.0),("gauss-seidel 1.5",True,1.5),("gauss-seidel 1.9",True,1.9)):
+                iterations,seconds = timeSolve(makeBeam(n,bending),gaussSeidel,relaxation)
+                iterations = "%10d" % iterations if iterations else "      >max"
+                print("%-9d %-8s %-19s %s  %7.2f" % (n,bending,name,iterations,seconds))
@@ -0,0 +1,40 @@
+﻿"""
+Benchmark the memory of one goal object per spring (like the goal lists made
+by ShapingCableGoals/ShapingBeamGoals) against a SpringGroup, whose goals
+share typed arrays and are accessed through lightweight GoalHandle objects.
+-
+Usage: python benchmarks/BenchmarkGoalMemory.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import tracemalloc
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessGoals as hg
+
+def measure(makeGoals):
+    
+    """ Return the memory (MB) held by the goals made by makeGoals """
+    
+    # Keep the goals alive until the traced memory is read
+    tracemalloc.start()
+    goals = makeGoals()
+    current = tracemalloc.get_traced_memory()[0]
+    del goals
+    tracemalloc.stop()
+    return current / 1e6
+
+if __name__ == "__main__":
+    
+    print("springs    objects(MB)  group(MB)  bytes/goal objects  bytes/goal group")
+    for count in (10000,100000,1000000):
+        pts = np.random.default_rng(0).random((count + 1,3))
+        objectMemory = measure(lambda: [hg.Spring(pts[i],pts[i + 1],1.0,1.0) for i in range(count)])
+        groupMemory = measure(lambda: hg.SpringGroup(pts[:-1],pts[1:],1.0,1.0))
+        print("%-10d %11.1f  %9.1f  %18.0f  %16.0f" % (count,objectMemory,groupMemory,
+              objectMemory * 1e6 / count,groupMemory * 1e6 / count))
@@ -0,0 +1,80 @@
+﻿"""
+Benchmark compiling the calibrated bar, cable, rod and self-weight load goals
+of a gridshell in one pass (HeadlessStructural.MemberModel) against making
+them member by member like calibratedBeamGoals and calibratedCableGoals, and
+then assigning the particles of all goals. The gridshell has beams in one
+direction and cables in the other, with the grid lines split into members of
+a few segments each.
+-
+Usage: python benchmarks/BenchmarkMemberGoals.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessStructural as hst
+import HeadlessPolylines as hp
+import Selfweight as sw
+
+def makeGridshell(n,segments=4,spacing=0.5):
+    
+    """ Make the member polylines of a n by n node gridshell and a per member cable flag """
+    
+    x,y = np.meshgrid(np.arange(n) * spacing,np.arange(n) * spacing,indexing="ij")
+    z = 0.2 * spacing * n * np.sin(np.pi * x / x.max()) * np.sin(np.pi * y / y.max())
+    nodes = np.stack((x,y,z),axis=-1)
+    polylines = []
+    cables = []
+    for lines,cable in ((nodes,False),(nodes.transpose(1,0,2),True)):
+        for line in lines:
+            for i in range(0,n - 1,segments):
+                polylines.append(line[i:i + segments + 1])
+                cables.append(cable)
+    return polylines,np.array(cables)
+
+def loopMemberGoals(polylines,cables,diameter,youngsModulus,density,prestress):
+    
+    """ Make the goals of each member on its own, then assign the particles of all goals """
+    
+    area,inertia,zDistance = hst.sectionProperties(diameter)
+    goals = []
+    for polyline,cable in zip(polylines,cables):
+        starts,ends = polyline[:-1],polyline[1:]
+        if cable:
+            goals.append(hst.CableGroup(starts,ends,youngsModulus * 0.01,area,prestress / 1000.0))
+        else:
+            goals.append(hst.BarGroup(starts,ends,youngsModulus * 0.01,area))
+            goals.append(hst.RodGroup(polyline[:-2],polyline[1:-1],polyline[1:-1],polyline[2:],youngsModulus * 0.01,inertia * 1e-6))
+        nodes,loads = sw.calcNodalSelfweight(starts,ends,area,density)
+        goals.append(hg.LoadGroup(nodes,loads))
+    ps = hs.PhysicalSystem()
+    ps.AssignPIndices(goals,0.0001)
+    return ps,goals
+
+if __name__ == "__main__":
+    
+    print("members   goals     loop(s)   batch(s)")
+    for n in (25,70,225):
+        polylines,cables = makeGridshell(n)
+        
+        # One pass, including the ragged layout and welding
+        t = time.perf_counter()
+        vertices,offsets = hp.raggedPolylines(polylines)
+        model = hst.MemberModel(vertices,offsets)
+        ps = model.makeSystem()
+        goals = model.calibratedGoals(cables,20.0,210000.0,7850.0,500.0,5.0)
+        batchTime = time.perf_counter() - t
+        
+        # Member by member
+        t = time.perf_counter()
+        loopMemberGoals(polylines,cables,20.0,210000.0,7850.0,500.0)
+        loopTime = time.perf_counter() - t
+        print("%-9d %-9d %7.3f   %8.3f" % (len(polylines),sum(g.Count for g in goals),loopTime,batchTime))
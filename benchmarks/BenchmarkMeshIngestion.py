@@ -0,0 +1,83 @@
+﻿"""
+Benchmark bulk mesh ingestion (HeadlessMesh.MeshTopology) against building the
+particles, naked vertex anchors and edge springs one at a time like the loops
+in TensileRelaxScript, on triangulated grid membranes. Also times reading the
+membrane back from an OBJ file.
+-
+Usage: python benchmarks/BenchmarkMeshIngestion.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessMesh as hm
+
+def makeMembrane(n):
+    
+    """ Make the vertices and triangle faces of a n by n grid membrane """
+    
+    x,y = np.meshgrid(np.arange(n + 1.0),np.arange(n + 1.0),indexing="ij")
+    vertices = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1)
+    ids = np.arange(len(vertices)).reshape(n + 1,n + 1)
+    a,b,c,d = ids[:-1,:-1].ravel(),ids[1:,:-1].ravel(),ids[1:,1:].ravel(),ids[:-1,1:].ravel()
+    return vertices,np.concatenate((np.stack((a,b,c),axis=1),np.stack((a,c,d),axis=1)))
+
+def loopIngest(vertices,faces):
+    
+    """ Add particles and goals one at a time, with the edges and naked vertices found in dicts """
+    
+    ps = hs.PhysicalSystem()
+    for pt in vertices:
+        ps.AddParticle(pt)
+    edgeFaces = {}
+    for f in faces:
+        for i in range(len(f)):
+            edge = tuple(sorted((int(f[i]),int(f[(i + 1) % len(f)]))))
+            edgeFaces[edge] = edgeFaces.get(edge,0) + 1
+    naked = set(i for edge,count in edgeFaces.items() if count == 1 for i in edge)
+    goals = [hg.Anchor(i,vertices[i],10000) for i in sorted(naked)]
+    goals.extend(hg.Spring(a,b,0,1) for a,b in edgeFaces)
+    return ps,goals
+
+if __name__ == "__main__":
+    
+    maxLoopFaces = 100000
+    print("faces     loop(s)   bulk(s)  welded(s)  readOBJ(s)")
+    for n in (100,223,500):
+        vertices,faces = makeMembrane(n)
+        
+        # Bulk ingestion, without and with welding
+        t = time.perf_counter()
+        ps,goals = hm.MeshTopology(vertices,faces).makeSystem()
+        bulkTime = time.perf_counter() - t
+        t = time.perf_counter()
+        ps,goals = hm.MeshTopology(vertices,faces,0.0001).makeSystem()
+        weldedTime = time.perf_counter() - t
+        
+        # Read the membrane from an OBJ file
+        path = os.path.join(tempfile.mkdtemp(),"membrane.obj")
+        with open(path,"w") as f:
+            f.write("".join("v %g %g %g\n" % tuple(v) for v in vertices))
+            f.write("".join("f %d %d %d\n" % tuple(face + 1) for face in faces))
+        t = time.perf_counter()
+        hm.readOBJ(path)
+        readTime = time.perf_counter() - t
+        os.remove(path)
+        
+        # One particle and goal at a time
+        if len(faces) <= maxLoopFaces:
+            t = time.perf_counter()
+            loopIngest(vertices,faces)
+            loopTime = "%7.3f" % (time.perf_counter() - t)
+        else:
+            loopTime = "skipped"
+        print("%-9d %s   %7.3f  %9.3f  %10.3f" % (len(faces),loopTime,bulkTime,weldedTime,readTime))
@@ -0,0 +1,60 @@
+﻿"""
+Benchmark multigrid V-cycles (HeadlessMultigrid) against relaxing the full
+resolution network only, on a loaded square tensile net of zero rest length
+springs anchored along its boundary (as relaxed by TensileRelaxScript). Reports
+the seconds, fine level iterations and largest deviation from a reference
+solution solved to a tight threshold.
+-
+Usage: python benchmarks/BenchmarkMultigrid.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessMultigrid as mg
+
+def makeNet(n):
+    
+    """ Make the points, edges and boundary of a n by n grid net """
+    
+    x,y = np.meshgrid(np.linspace(0.0,10.0,n + 1),np.linspace(0.0,10.0,n + 1),indexing="ij")
+    points = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1)
+    ids = np.arange(len(points)).reshape(n + 1,n + 1)
+    edges = np.concatenate((np.stack((ids[:-1].ravel(),ids[1:].ravel()),axis=1),
+                            np.stack((ids[:,:-1].ravel(),ids[:,1:].ravel()),axis=1)))
+    boundary = (x.ravel() % 10.0 == 0.0) | (y.ravel() % 10.0 == 0.0)
+    return points,edges,boundary
+
+def makeGoals(level):
+    return mg.networkGoals(level,load=[0.0,0.0,-1e-5])
+
+if __name__ == "__main__":
+    
+    maxIterations = 5000
+    print("nodes     mode        seconds  iterations  max deviation")
+    for n in (100,300):
+        points,edges,boundary = makeNet(n)
+        t = time.perf_counter()
+        levels = mg.buildHierarchy(points,edges,0.0,boundary)
+        buildTime = time.perf_counter() - t
+        reference = mg.multigridSolve(levels,makeGoals,1e-20,maxCycles=30)[0].GetPositions()
+        
+        # Multigrid V-cycles, including building the hierarchy
+        t = time.perf_counter()
+        ps,goals,cycles = mg.multigridSolve(levels,makeGoals,1e-12)
+        seconds = buildTime + time.perf_counter() - t
+        deviation = np.abs(ps.GetPositions() - reference).max()
+        print("%-9d %-11s %7.2f  %10d  %.1e" % (len(points),"multigrid",seconds,ps.GetIterations(),deviation))
+        
+        # Full resolution only
+        t = time.perf_counter()
+        ps,goals,cycles = mg.multigridSolve(levels[:1],makeGoals,1e-12,maxCycles=1,coarseIterations=maxIterations)
+        seconds = time.perf_counter() - t
+        deviation = np.abs(ps.GetPositions() - reference).max()
+        print("%-9d %-11s %7.2f  %10d  %.1e" % (len(points),"fine only",seconds,ps.GetIterations(),deviation))
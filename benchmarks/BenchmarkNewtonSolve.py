@@ -0,0 +1,59 @@
+﻿"""
+Benchmark the implicit newtonSolve (HeadlessImplicit) against the explicit
+adaptiveSolve driver on a 10 m steel beam of calibrated bar, rod and
+self-weight load goals (HeadlessStructural.MemberModel), pinned at both ends.
+The lengths are in metres, the diameter in mm, E in N/mm2 and the density in
+kg/m3, as in CalibratedBeamGoals. The beam starts either straight or with a
+sine shaped sag close to its equilibrium. Reports the iterations, wall time,
+why each solve stopped and the largest particle force left.
+-
+Usage: python benchmarks/BenchmarkNewtonSolve.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessStructural as hst
+import HeadlessImplicit as hi
+
+def makeBeam(segments,sag,length=10.0):
+    
+    """ Make the system and goals of a pinned beam with a sine shaped initial sag """
+    
+    x = np.linspace(0.0,length,segments + 1)
+    pts = np.stack((x,np.zeros_like(x),-sag * np.sin(np.pi * x / length)),axis=1)
+    model = hst.MemberModel(pts,[0,len(pts)])
+    goals = model.calibratedGoals(False,50.0,210000.0,7850.0)
+    ends = np.array([0,segments])
+    goals.append(hst.SupportGroup(ends,model.Points[ends],1,1,1,1e6))
+    return model.makeSystem(),goals
+
+if __name__ == "__main__":
+    
+    print("segments  sag   mode      iterations  seconds  stop            max force")
+    for segments in (20,40,80):
+        for sag in (0.0,0.25):
+            
+            # Implicit
+            ps,goals = makeBeam(segments,sag)
+            t = time.perf_counter()
+            trace = hi.newtonSolve(ps,goals)
+            seconds = time.perf_counter() - t
+            force = np.abs(hi.calcResidual(goals,ps.GetPositions())).max()
+            print("%-9d %-5.2f %-9s %-11d %-8.3f %-15s %.1e" % (segments,sag,"newton",trace.iterations,seconds,trace.reason,force))
+            
+            # Explicit
+            ps,goals = makeBeam(segments,sag)
+            hs.indexGoals(goals,0.0001,ps)
+            t = time.perf_counter()
+            trace = hs.adaptiveSolve(ps,goals,maxIterations=100000)
+            seconds = time.perf_counter() - t
+            force = np.abs(hi.calcResidual(goals,ps.GetPositions())).max()
+            print("%-9d %-5.2f %-9s %-11d %-8.3f %-15s %.1e" % (segments,sag,"adaptive",trace.iterations,seconds,trace.reason,force))
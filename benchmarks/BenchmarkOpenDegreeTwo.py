@@ -0,0 +1,69 @@
+﻿"""
+Benchmark opening the degree two nodes of a cable network with array
+operations (HeadlessNetwork.openDegreeTwoNodes) against counting the line ends
+with a Counter and rotating the lines one at a time like openDegreeTwoNodes in
+RelaxCableNetworkIntoPlane, on grid networks with every edge split in two.
+-
+Usage: python benchmarks/BenchmarkOpenDegreeTwo.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import math
+import time
+import numpy as np
+from collections import Counter
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessNetwork as hn
+
+def makeLines(n):
+    
+    """ Make the start/end points of a n by n grid network, splitting every edge at a degree two node """
+    
+    x,y = np.meshgrid(np.arange(n,dtype=np.float64),np.arange(n,dtype=np.float64),indexing="ij")
+    points = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1)
+    ids = np.arange(x.size).reshape(n,n)
+    edges = np.concatenate((np.stack((ids[:-1].ravel(),ids[1:].ravel()),axis=1),
+                            np.stack((ids[:,:-1].ravel(),ids[:,1:].ravel()),axis=1)))
+    mids = 0.5 * (points[edges[:,0]] + points[edges[:,1]])
+    return np.concatenate((mids,mids)),np.concatenate((points[edges[:,0]],points[edges[:,1]]))
+
+def loopOpenDegreeTwoNodes(starts,ends,angle):
+    
+    """ Count the line ends with a Counter and rotate the lines at degree two nodes one at a time """
+    
+    counts = Counter([tuple(pt) for pt in starts.tolist()] + [tuple(pt) for pt in ends.tolist()])
+    valTwoVts = [pt for pt,n in counts.items() if n == 2]
+    a = math.radians(angle)
+    newStarts = []
+    for start,end in zip(starts.tolist(),ends.tolist()):
+        if tuple(start) in valTwoVts:
+            dx,dy = start[0] - end[0],start[1] - end[1]
+            start = [end[0] + dx * math.cos(a) - dy * math.sin(a),end[1] + dx * math.sin(a) + dy * math.cos(a),start[2]]
+        newStarts.append(start)
+    return newStarts
+
+if __name__ == "__main__":
+    
+    maxLoopLines = 20000
+    print("lines     loop(s)   batch(s)")
+    for n in (30,70,160,500):
+        starts,ends = makeLines(n)
+        
+        # Array operations
+        t = time.perf_counter()
+        hn.openDegreeTwoNodes(starts,ends,10.0)
+        batchTime = time.perf_counter() - t
+        
+        # One line at a time, with linear membership tests
+        if len(starts) <= maxLoopLines:
+            t = time.perf_counter()
+            loopOpenDegreeTwoNodes(starts,ends,10.0)
+            loopTime = "%7.3f" % (time.perf_counter() - t)
+        else:
+            loopTime = "skipped"
+        print("%-9d %s   %8.3f" % (len(starts),loopTime,batchTime))
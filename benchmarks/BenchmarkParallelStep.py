@@ -0,0 +1,60 @@
+﻿"""
+Benchmark serial against threaded solver steps on one large cable network (a
+square grid of springs with anchored edges and nodal loads), with the spring
+group split across the threads by the solver step itself.
+-
+Usage: python benchmarks/BenchmarkParallelStep.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+
+def makeCableNet(n):
+    
+    """ Make the goals of a n by n grid cable network """
+    
+    x,y = np.meshgrid(np.arange(n + 1.0),np.arange(n + 1.0),indexing="ij")
+    pts = np.stack((x.ravel(),y.ravel(),np.zeros(x.size)),axis=1)
+    ids = np.arange(len(pts)).reshape(n + 1,n + 1)
+    edges = np.concatenate((np.stack((ids[:-1].ravel(),ids[1:].ravel()),axis=1),
+                            np.stack((ids[:,:-1].ravel(),ids[:,1:].ravel()),axis=1)))
+    boundary = (x.ravel() % n == 0) | (y.ravel() % n == 0)
+    loads = np.tile([0.0,0.0,-0.1],(np.count_nonzero(~boundary),1))
+    return [hg.SpringGroup(pts[edges[:,0]],pts[edges[:,1]],0.9,10.0),
+            hg.AnchorGroup(pts[boundary],1000.0),
+            hg.LoadGroup(pts[~boundary],loads)]
+
+def timeSteps(threads,n,steps=20):
+    
+    """ Time the mean duration of a solver step, returns it with the final positions """
+    
+    goals = makeCableNet(n)
+    ps = hs.PhysicalSystem()
+    ps.Threads = threads
+    ps.MinPartition = 1000
+    ps.AssignPIndices(goals,0.0001)
+    ps.Step(goals,True,0.0)
+    t = time.perf_counter()
+    for i in range(steps):
+        ps.Step(goals,True,0.0)
+    return (time.perf_counter() - t) / steps,ps.GetPositions()
+
+if __name__ == "__main__":
+    
+    print("CPUs: %d" % (os.cpu_count() or 1))
+    print("springs    threads  s/step   speedup  max deviation")
+    for n in (100,300,1000):
+        serialTime,serialPositions = timeSteps(1,n)
+        for threads in (1,2,4,8):
+            stepTime,positions = timeSteps(threads,n)
+            deviation = np.abs(positions - serialPositions).max()
+            print("%-10d %-8d %-8.4f %-9.2f %.1e" % (2 * n * (n + 1),threads,stepTime,serialTime / stepTime,deviation))
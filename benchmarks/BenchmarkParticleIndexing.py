@@ -0,0 +1,73 @@
+﻿"""
+Benchmark assigning particle indices goal by goal (PhysicalSystem.AssignPIndex)
+against the bulk spatial hash (PhysicalSystem.AssignPIndices), on springs
+meeting at shared nodes and on springs between random points spaced about the
+tolerance apart. Both must make the same particles.
+-
+Usage: python benchmarks/BenchmarkParticleIndexing.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+import numpy as np
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+
+def makeSpringGoals(pointCount,tolerance,seed=0):
+    
+    """ Make springs whose end points coincide (within tolerance) at random nodes """
+    
+    rng = np.random.default_rng(seed)
+    nodes = rng.random((pointCount // 4,3)) * 100.0
+    pairs = rng.integers(0,len(nodes),(pointCount // 2,2))
+    jitter = rng.uniform(-0.1,0.1,(len(pairs),2,3)) * tolerance
+    ends = nodes[pairs] + jitter
+    return [hg.Spring(a,b,1.0,1.0) for a,b in ends]
+
+def makeCloudGoals(pointCount,tolerance,seed=0):
+    
+    """ Make springs between random points in a box sized so neighbouring points are about the tolerance apart """
+    
+    rng = np.random.default_rng(seed)
+    ends = rng.random((pointCount // 2,2,3)) * tolerance * pointCount ** (1.0 / 3.0)
+    return [hg.Spring(a,b,1.0,1.0) for a,b in ends]
+
+def timeIndexing(goals,tolerance,bulk):
+    
+    """ Time assigning particle indices to goals, returns seconds, particle count and particle indices """
+    
+    for g in goals:
+        g.PIndex = None
+    ps = hs.PhysicalSystem()
+    t = time.perf_counter()
+    if bulk:
+        ps.AssignPIndices(goals,tolerance)
+    else:
+        for g in goals:
+            ps.AssignPIndex(g,tolerance)
+    seconds = time.perf_counter() - t
+    return seconds,ps.ParticleCount(),np.concatenate([g.PIndex for g in goals])
+
+if __name__ == "__main__":
+    
+    tolerance = 0.0001
+    maxPerGoalPoints = 100000
+    print("input   points     per-goal(s)  bulk(s)  particles")
+    for name,makeGoals in (("nodes",makeSpringGoals),("cloud",makeCloudGoals)):
+        for pointCount in (10000,100000,1000000):
+            goals = makeGoals(pointCount,tolerance)
+            bulkTime,count,pIndex = timeIndexing(goals,tolerance,True)
+            if pointCount <= maxPerGoalPoints:
+                perGoalTime,perGoalCount,perGoalPIndex = timeIndexing(goals,tolerance,False)
+                assert perGoalCount == count
+                assert np.array_equal(perGoalPIndex,pIndex)
+                perGoal = "%11.3f" % perGoalTime
+            else:
+                perGoal = "    skipped"
+            print("%-7s %-10d %s  %7.3f  %d" % (name,pointCount,perGoal,bulkTime,count))
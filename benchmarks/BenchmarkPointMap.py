@@ -0,0 +1,62 @@
+﻿"""
+Benchmark matching line end points to graph nodes with list.index (as the
+original linesToGraph did) against the tolerance aware PointMap.
+-
+Usage: python benchmarks/BenchmarkPointMap.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import time
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import PointMap as pm
+
+def makeGridLines(edgeCount):
+    
+    """ Make a square grid network of roughly edgeCount lines as point tuples """
+    
+    n = int((edgeCount / 2) ** 0.5) + 1
+    lines = []
+    for i in range(n):
+        for j in range(n):
+            if i + 1 < n:
+                lines.append(((float(i),float(j),0.0),(float(i+1),float(j),0.0)))
+            if j + 1 < n:
+                lines.append(((float(i),float(j),0.0),(float(i),float(j+1),0.0)))
+    return lines[:edgeCount]
+
+def listIndexNodes(lines):
+    
+    """ Match end points to nodes like the original linesToGraph """
+    
+    uniquePts = list(set([pt for l in lines for pt in l]))
+    uniquePts.sort()
+    return [(uniquePts.index(a),uniquePts.index(b)) for a,b in lines]
+
+def pointMapNodes(lines):
+    
+    """ Match end points to nodes like the current linesToGraph """
+    
+    nodeMap = pm.PointMap(0.000001)
+    return [(nodeMap.add(a),nodeMap.add(b)) for a,b in lines]
+
+if __name__ == "__main__":
+    
+    maxListIndexEdges = 10000
+    print("edges      list.index(s)  PointMap(s)")
+    for edgeCount in (1000,10000,100000):
+        lines = makeGridLines(edgeCount)
+        t = time.perf_counter()
+        pointMapNodes(lines)
+        mapTime = time.perf_counter() - t
+        if edgeCount <= maxListIndexEdges:
+            t = time.perf_counter()
+            listIndexNodes(lines)
+            listTime = "%13.3f" % (time.perf_counter() - t)
+        else:
+            listTime = "      skipped"
+        print("%-10d %s  %11.3f" % (edgeCount,listTime,mapTime))
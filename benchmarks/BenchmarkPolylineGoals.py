@@ -0,0 +1,80 @@
+﻿"""
+Benchmark compiling the spring and angle goals of many bending polylines in
+batch (HeadlessPolylines.PolylineModel.beamGoals) against making them polyline
+by polyline and segment by segment like shapingBeamGoals in ShapingBeamGoals,
+on random zig-zag polylines.
+-
+Usage: python benchmarks/BenchmarkPolylineGoals.py
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import sys
+import math
+import time
+import numpy as np
+from collections import deque
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),"..","src"))
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessPolylines as hp
+
+def makePolylines(count,segments,seed=0):
+    
+    """ Make count random polylines with segments segments each, placed side by side """
+    
+    rng = np.random.default_rng(seed)
+    steps = rng.normal(0.0,1.0,(count,segments + 1,3))
+    steps[:,0] = np.arange(count)[:,None] * 100.0
+    return list(np.cumsum(steps,axis=1))
+
+def loopBeamGoals(polylines,targetLengths,springStrength,bendStrength,bendAngleMin):
+    
+    """ Make the goals one polyline and one segment at a time, then assign their particles """
+    
+    goals = []
+    for polyline,totalLength in zip(polylines,targetLengths):
+        segs = deque(zip(polyline[:-1],polyline[1:]))
+        lengths = [np.sqrt((b - a).dot(b - a)) for a,b in segs]
+        lf = totalLength / sum(lengths)
+        for (a,b),l in zip(segs,lengths):
+            goals.append(hg.Spring(a,b,l * lf,springStrength * len(segs)))
+        for k in range(len(segs)):
+            (a0,a1),(b0,b1) = segs[0],segs[1]
+            if np.array_equal(a1,b0):
+                vA,vB = a1 - a0,b0 - b1
+                cosAngle = vA.dot(vB) / math.sqrt(vA.dot(vA) * vB.dot(vB))
+                if math.degrees(math.acos(max(-1.0,min(1.0,cosAngle)))) > bendAngleMin + 1:
+                    goals.append(hg.AngleGroup([a0],[a1],[b0],[b1],0.0,bendStrength))
+            segs.rotate(-1)
+    ps = hs.PhysicalSystem()
+    ps.AssignPIndices(goals,0.0001)
+    return ps,goals
+
+if __name__ == "__main__":
+    
+    maxLoopPolylines = 2000
+    print("polylines  goals     loop(s)   batch(s)")
+    for count in (200,2000,20000):
+        polylines = makePolylines(count,10)
+        targetLengths = np.full(count,12.0)
+        
+        # Batch, including the ragged layout and welding
+        t = time.perf_counter()
+        vertices,offsets = hp.raggedPolylines(polylines)
+        model = hp.PolylineModel(vertices,offsets)
+        ps = model.makeSystem()
+        springs,angles = model.beamGoals(targetLengths,1.0,1.0,10.0)
+        batchTime = time.perf_counter() - t
+        
+        # Polyline by polyline
+        if count <= maxLoopPolylines:
+            t = time.perf_counter()
+            loopBeamGoals(polylines,targetLengths,1.0,1.0,10.0)
+            loopTime = "%7.3f" % (time.perf_counter() - t)
+        else:
+            loopTime = "skipped"
+        print("%-10d %-9d %s   %8.3f" % (count,springs.Count + angles.Count,loopTime,batchTime))
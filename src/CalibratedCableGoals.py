@@ -27,30 +27,7 @@ clr.AddReferenceToFileAndPath(gh.Folders.PluginFolder+"Components\KangarooSolver
 clr.AddReferenceToFileAndPath(gh.Folders.DefaultAssemblyFolder+"K2Engineering.gha")
 import KangarooSolver as ks
 import K2Engineering as k2e
-
-def calcNodalSelfweight(bars,nodes,area,rho):
-    
-    # Initialise force array
-    nodalForces = [rc.Geometry.Vector3d(0,0,0) for n in nodes]
-    
-    # force direction
-    dir = rc.Geometry.Vector3d(0,0,-1)
-    
-    # Add forces resulting from each bar
-    for l in bars:
-        
-        # Get index line start/end in nodes
-        indexStart = nodes.IndexOf(nodes,l.From)
-        indexEnd = nodes.IndexOf(nodes,l.To)
-        
-        edge = l.To - l.From
-        length = edge.Length * 0.5
-        
-        force = dir * length * area * 1e-6 * rho * 9.82
-        nodalForces[indexStart] += force
-        nodalForces[indexEnd] += force
-        
-    return nodalForces
+import Selfweight as sw
 
 def calibratedCableGoals(plc,youngsModulus,area,prestress,rho):
     
@@ -62,8 +39,6 @@ def calibratedCableGoals(plc,youngsModulus,area,prestress,rho):
     # Convert to polyline and get segments
     if type(plc) is not rc.Geometry.Polyline:
         polyline = plc.TryGetPolyline()[1]
-    vts = polyline.ToArray()
-    uniqueVts = rc.Geometry.Point3d.CullDuplicates(vts,0.001)
     segs = polyline.GetSegments()
     
     # Make cable goals (replacing springs)
@@ -74,9 +49,9 @@ def calibratedCableGoals(plc,youngsModulus,area,prestress,rho):
         goals.append(g)
         
     # Make selfweight load goals
-    loadVectors = calcNodalSelfweight(segs,uniqueVts,area,rho)
-    for v,pt in zip(loadVectors,uniqueVts):
-        g =  k2e.Load.LoadGoal(pt,v)
+    nodes,loadVectors = sw.calcNodalSelfweight([l.From for l in segs],[l.To for l in segs],area,rho)
+    for v,pt in zip(loadVectors,nodes):
+        g =  k2e.Load.LoadGoal(pt,rc.Geometry.Vector3d(v[0],v[1],v[2]))
         goals.append(g)
     
     # Make show/locator goal for outputting polyline from solver
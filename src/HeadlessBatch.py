@@ -0,0 +1,90 @@
+﻿"""
+Solve many independent goal sets (e.g. design space sweeps over SpringStrength,
+AngleStrength or Prestress) with the headless solver across a process pool.
+Results are streamed back as they finish, tagged with the index of their job,
+or in job order when ordered is set. Goals given by particle indices (e.g.
+mesh or network goal groups) are solved on particles made from positions.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import copy
+import itertools
+import multiprocessing
+import HeadlessSolver as hs
+
+class BatchResult(object):
+
+    """ The solved state of one job in a batch """
+
+    def __init__(self,index,parameters,ps,iterations,outputs):
+
+        self.index = index
+        self.parameters = parameters
+        self.iterations = iterations
+        self.vSum = ps.GetvSum()
+        self.positions = ps.GetPositions()
+        self.outputs = outputs
+
+def parameterGrid(**ranges):
+
+    """ Make a list of parameter dicts for every combination of the given value ranges """
+
+    names = sorted(ranges)
+    return [dict(zip(names,values)) for values in itertools.product(*[ranges[n] for n in names])]
+
+def solveJob(job):
+
+    """ Make (if needed) and solve the goals of one job, runs in the worker processes """
+
+    # Unpack job, goals are either given or made from the parameters
+    index,makeGoals,parameters,goals,positions,settings = job
+    if makeGoals is not None:
+        goals = makeGoals(**parameters)
+
+    # Solve goals
+    tolerance,threshold,maxIterations = settings
+    ps,iterations = hs.zombieSolve(goals,tolerance,threshold,maxIterations,positions=positions)
+    return BatchResult(index,parameters,ps,iterations,ps.GetOutput(goals))
+
+def solveJobs(jobs,processes=None,ordered=False,chunksize=1):
+
+    """ Solve jobs across a process pool, yielding each BatchResult as it finishes """
+
+    # Solve in this process if only one worker is asked for, on copies like the workers get
+    if processes == 1:
+        for job in jobs:
+            yield solveJob(copy.deepcopy(job))
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        if ordered:
+            results = pool.imap(solveJob,jobs,chunksize)
+        else:
+            results = pool.imap_unordered(solveJob,jobs,chunksize)
+        for result in results:
+            yield result
+    finally:
+        pool.terminate()
+
+def solveGoalSets(goalSets,tolerance=0.0001,threshold=1e-13,maxIterations=5000,processes=None,ordered=False,positions=None):
+
+    """ Solve a list of independent goal lists (with a list of particle positions, if given), yielding a BatchResult per goal list """
+
+    settings = (tolerance,threshold,maxIterations)
+    if positions is None:
+        positions = [None] * len(goalSets)
+    jobs = [(i,None,None,goals,pts,settings) for i,(goals,pts) in enumerate(zip(goalSets,positions))]
+    return solveJobs(jobs,processes,ordered)
+
+def solveSweep(makeGoals,parameterSets,tolerance=0.0001,threshold=1e-13,maxIterations=5000,processes=None,ordered=False,positions=None):
+
+    """ Solve the goals made by makeGoals(**parameters) for each parameter dict (on shared particle positions, if given), yielding a BatchResult each """
+
+    # makeGoals must be a module level function so it can be sent to the worker processes
+    settings = (tolerance,threshold,maxIterations)
+    jobs = [(i,makeGoals,p,None,positions,settings) for i,p in enumerate(parameterSets)]
+    return solveJobs(jobs,processes,ordered)
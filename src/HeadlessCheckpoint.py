@@ -0,0 +1,114 @@
+﻿"""
+Checkpoint and resume long headless solves (e.g. multi-hour structural
+relaxations on preemptible machines). A checkpoint is a single uncompressed
+.npz file holding the particle positions and velocities, the solver state and
+the particle indices, weightings and parameters of every goal. It is written
+to a temporary file and renamed over the previous checkpoint, so a solve that
+is killed mid write always leaves the last complete checkpoint behind.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import time
+import numpy as np
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+
+def goalArrays(g):
+
+    """ Get the arrays that hold the state of a goal, by attribute name """
+
+    names = ["PIndex","Weighting"] + list(getattr(g,"Parameters",()))
+    if hasattr(g,"Params"):
+        names.append("Params")
+
+    # Goals that do not calculate their moves (e.g. loads) hold their forces in them
+    if type(g).Calculate is hg.GoalObject.Calculate:
+        names.append("Move")
+    return dict((name,getattr(g,name)) for name in names)
+
+def saveCheckpoint(path,ps,goals):
+
+    """ Atomically write the state of a system and its goals to path """
+
+    # Collect the solver state and the goal arrays, prefixed by goal number
+    arrays = dict(("system." + name,value) for name,value in ps.GetState().items())
+    arrays["goalTypes"] = np.array([type(g).__name__ for g in goals])
+    for i,g in enumerate(goals):
+        for name,value in goalArrays(g).items():
+            arrays["goal%d.%s" % (i,name)] = np.asarray(value)
+
+    # Write to a temporary file and rename it over the previous checkpoint
+    temporary = path + ".tmp"
+    with open(temporary,"wb") as f:
+        np.savez(f,**arrays)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary,path)
+
+def loadCheckpoint(path,ps,goals):
+
+    """ Restore the state of a system and its goals (made as for the checkpointed solve) from path """
+
+    with np.load(path,allow_pickle=False) as checkpoint:
+
+        # Check that the goals match the checkpointed goals
+        goalTypes = [str(t) for t in checkpoint["goalTypes"]]
+        if goalTypes != [type(g).__name__ for g in goals]:
+            raise ValueError("Goals do not match the goals of checkpoint %s" % path)
+
+        # Restore the system and the goal arrays
+        ps.SetState(dict((name,checkpoint["system." + name]) for name in ps.GetState()))
+        for i,g in enumerate(goals):
+            for name in goalArrays(g):
+                setattr(g,name,checkpoint["goal%d.%s" % (i,name)])
+
+class Checkpointer(object):
+
+    """ Save a checkpoint every N steps and/or every N seconds """
+
+    def __init__(self,path,everySteps=None,everySeconds=None):
+
+        self.path = path
+        self.everySteps = everySteps
+        self.everySeconds = everySeconds
+        self.saved = 0
+        self._steps = 0
+        self._time = time.time()
+
+    def update(self,ps,goals):
+
+        """ Save a checkpoint if one is due, call once after each step """
+
+        self._steps += 1
+        due = self.everySteps and self._steps >= self.everySteps
+        due = due or (self.everySeconds and time.time() - self._time >= self.everySeconds)
+        if due:
+            saveCheckpoint(self.path,ps,goals)
+            self.saved += 1
+            self._steps = 0
+            self._time = time.time()
+
+def resumeZombieSolve(goals,path,tolerance=0.0001,threshold=1e-13,maxIterations=5000,everySteps=None,everySeconds=60.0,positions=None):
+
+    """ Zombie solve goals with checkpoints at path, resuming from it if it exists, returns system and iterations """
+
+    # Resume from the last checkpoint, or start anew (with positions for goals given by particle indices)
+    if os.path.exists(path):
+        ps = hs.PhysicalSystem()
+        loadCheckpoint(path,ps,goals)
+    else:
+        ps = hs.indexGoals(goals,tolerance,positions=positions)
+
+    # Solve the remaining iterations, checkpointing as we go and at the end
+    checkpointer = Checkpointer(path,everySteps,everySeconds)
+    while ps.GetIterations() < maxIterations:
+        ps.Step(goals,False,threshold)
+        checkpointer.update(ps,goals)
+        if ps.GetvSum() < threshold:
+            break
+    saveCheckpoint(path,ps,goals)
+    return ps,ps.GetIterations()
@@ -0,0 +1,96 @@
+﻿"""
+Custom goals for the headless solver, written against NumPy arrays of a whole
+batch of goal instances rather than one .NET goal object at a time (compare
+CustomKangaroo2Goal). A subclass of CustomGoal implements the static method
+calculate(pts,params,moves,weights), which is compiled once per goal class with
+Numba when it is installed, and otherwise runs as plain NumPy.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import numpy as np
+import HeadlessGoals as hg
+try:
+    import numba
+    NumbaError = numba.core.errors.NumbaError
+except ImportError:
+    numba = None
+    NumbaError = ()
+
+class CustomGoal(hg.GoalGroup):
+
+    """ Base class for batch goals, subclasses implement calculate """
+
+    def __init__(self,columns,params):
+
+        # Columns hold one particle per goal instance, params one row per parameter, each a value or one per instance
+        hg.GoalGroup.__init__(self,columns,1.0)
+        rows = [np.broadcast_to(np.asarray(v,dtype=np.float64),(self.Count,)) for v in params]
+        self.Params = np.stack(rows) if rows else np.zeros((0,self.Count))
+        self.Slots = len(columns)
+
+    def select(self,indices):
+        part = hg.GoalGroup.select(self,indices)
+        part.Params = np.ascontiguousarray(self.Params[:,indices])
+        return part
+
+    @staticmethod
+    def calculate(pts,params,moves,weights):
+
+        """ Set moves (slots,m,3) and weights (slots,m) from pts (slots,m,3) and params (k,m) """
+
+        raise NotImplementedError
+
+    @classmethod
+    def kernel(cls):
+
+        """ Get the calculate function of this goal class, compiled with Numba when possible """
+
+        if "_kernel" not in cls.__dict__:
+            cls._kernel = cls.calculate
+            cls.compiled = False
+            if numba is not None:
+                cls._kernel = numba.njit(cls.calculate)
+                cls.compiled = True
+        return cls._kernel
+
+    def Calculate(self,p):
+
+        # Gather the instance particles and run the kernel on views of Move and Weighting
+        pts = p[self.PIndex].reshape(self.Slots,self.Count,3)
+        moves = self.Move.reshape(self.Slots,self.Count,3)
+        weights = self.Weighting.reshape(self.Slots,self.Count)
+        try:
+            type(self).kernel()(pts,self.Params,moves,weights)
+        except NumbaError:
+
+            # Fall back to NumPy for calculate functions Numba can not compile
+            type(self)._kernel = type(self).calculate
+            type(self).compiled = False
+            type(self).calculate(pts,self.Params,moves,weights)
+
+class Spring(CustomGoal):
+
+    """ Batch version of the CustomKangaroo2Goal spring, replicates the standard K2 spring/length goal """
+
+    def __init__(self,starts,ends,restLengths,stiffnesses):
+
+        CustomGoal.__init__(self,[starts,ends],[restLengths,stiffnesses])
+
+    @staticmethod
+    def calculate(pts,params,moves,weights):
+        current = pts[1] - pts[0]
+        length = np.sqrt(current[:,0]**2 + current[:,1]**2 + current[:,2]**2)
+        safe = np.where(length > 0.0,length,1.0)
+        stretchfactor = np.where(length > 0.0,1.0 - params[0] / safe,0.0)
+        for k in range(3):
+            springMove = 0.5 * current[:,k] * stretchfactor
+            moves[0,:,k] = springMove
+            moves[1,:,k] = -springMove
+        weights[0] = 2.0 * params[1]
+        weights[1] = 2.0 * params[1]
+
+    def OutputIndices(self):
+        return np.stack((self.column(0),self.column(1)),axis=1)
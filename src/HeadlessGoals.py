@@ -0,0 +1,357 @@
+﻿"""
+Kangaroo2 style goals for the headless NumPy particle system in HeadlessSolver.
+Each goal stores its particle positions (PPos), particle indices (PIndex),
+moves (Move) and weightings (Weighting) as NumPy arrays, so that the solver
+can sum them into its particle accumulators without any .NET calls.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import copy
+import numpy as np
+
+def isIndex(x):
+
+    """ Check if a goal input is a particle index rather than a point """
+
+    return isinstance(x,(int,np.integer))
+
+class GoalObject(object):
+
+    """ Base class that replicates the ks.GoalObject interface """
+
+    # Names of the attributes holding the goal parameters
+    Parameters = ()
+
+    def __init__(self,pts,weighting=1.0):
+
+        # Inputs are either particle indices or point coordinates
+        if all(isIndex(pt) for pt in pts):
+            self.PPos = None
+            self.PIndex = np.array(pts,dtype=np.int64)
+        else:
+            self.PPos = np.array(pts,dtype=np.float64).reshape(-1,3)
+            self.PIndex = None
+
+        # Make move and weighting arrays
+        self.Move = np.zeros((len(pts),3))
+        self.Weighting = np.full(len(pts),float(weighting))
+        self.Name = None
+
+    def Calculate(self,p):
+
+        """ Set Move and Weighting from the particle positions array p """
+
+        pass
+
+    def OutputIndices(self):
+
+        """ Return the particle indices the goal output is made of, or None if it has no output """
+
+        return None
+
+    def Output(self,p):
+
+        """ Return the goal output from the particle positions array p """
+
+        indices = self.OutputIndices()
+        if indices is None:
+            return None
+        return p[indices]
+
+class Spring(GoalObject):
+
+    """ Keep two particles at a rest length, replicates ks.Goals.Spring """
+
+    Parameters = ("RestLength",)
+
+    def __init__(self,start,end,restLength,strength):
+
+        GoalObject.__init__(self,[start,end],strength)
+        self.RestLength = float(restLength)
+
+    def Calculate(self,p):
+        current = p[self.PIndex[1]] - p[self.PIndex[0]]
+        length = np.sqrt(current.dot(current))
+        if length == 0.0:
+            self.Move[:] = 0.0
+            return
+        springMove = 0.5 * current * (1.0 - self.RestLength / length)
+        self.Move[0] = springMove
+        self.Move[1] = -springMove
+
+    def OutputIndices(self):
+        return self.PIndex
+
+class Anchor(GoalObject):
+
+    """ Pull a particle to a target point, replicates ks.Goals.Anchor """
+
+    Parameters = ("Target",)
+
+    def __init__(self,point,target,strength=None):
+
+        # Support both Anchor(point,strength) and Anchor(index,target,strength)
+        if strength is None:
+            target,strength = point,target
+        GoalObject.__init__(self,[point],strength)
+        self.Target = np.array(target,dtype=np.float64)
+
+    def Calculate(self,p):
+        self.Move[0] = self.Target - p[self.PIndex[0]]
+
+class Load(GoalObject):
+
+    """ Apply a constant force vector to a particle, replicates ks.Goals.Unary """
+
+    def __init__(self,point,force):
+
+        GoalObject.__init__(self,[point],1.0)
+        self.Move[0] = np.array(force,dtype=np.float64)
+
+class Locator(GoalObject):
+
+    """ Pass geometry through the solver, replicates ks.Goals.Locator """
+
+    def __init__(self,pts):
+
+        GoalObject.__init__(self,pts,0.0)
+
+    def OutputIndices(self):
+        return self.PIndex
+
+class GoalHandle(object):
+
+    """ Lightweight handle to one goal in a goal group, made on demand. PIndex, PPos, Move and Weighting are strided
+    views into the group arrays, so writing to their elements writes to the group """
+
+    __slots__ = ("Group","Index")
+
+    def __init__(self,group,index):
+
+        object.__setattr__(self,"Group",group)
+        object.__setattr__(self,"Index",index)
+
+    @property
+    def PIndex(self):
+        if self.Group.PIndex is None:
+            return None
+        return self.Group.PIndex[self.Index::self.Group.Count]
+
+    @property
+    def PPos(self):
+        if self.Group.PPos is None:
+            return None
+        return self.Group.PPos[self.Index::self.Group.Count]
+
+    @property
+    def Move(self):
+        return self.Group.Move[self.Index::self.Group.Count]
+
+    @property
+    def Weighting(self):
+        return self.Group.Weighting[self.Index::self.Group.Count]
+
+    @Weighting.setter
+    def Weighting(self,value):
+        self.Group.Weighting[self.Index::self.Group.Count] = value
+
+    def __getstate__(self):
+        return (self.Group,self.Index)
+
+    def __setstate__(self,state):
+        object.__setattr__(self,"Group",state[0])
+        object.__setattr__(self,"Index",state[1])
+
+    def __getattr__(self,name):
+
+        # Special names and the slots are not looked up on the group, which is unset while copying or unpickling
+        if name.startswith("__") or name in GoalHandle.__slots__:
+            raise AttributeError(name)
+
+        # Per goal parameters (e.g. RestLength) are indexed, shared ones (e.g. Normal) are not
+        if name in self.Group.Parameters:
+            return getattr(self.Group,name)[self.Index]
+        return getattr(self.Group,name)
+
+    def __setattr__(self,name,value):
+        if name == "Weighting":
+            object.__setattr__(self,name,value)
+        elif name in self.Group.Parameters:
+            getattr(self.Group,name)[self.Index] = value
+        else:
+            raise AttributeError("Goal handles can only set per goal parameters")
+
+class GoalGroup(GoalObject):
+
+    """ Base class for many goals of one type solved in a single vectorized pass """
+
+    # Names of the arrays holding one parameter value per goal
+    Parameters = ()
+
+    def __init__(self,columns,weighting=1.0):
+
+        # Each column holds one particle per goal, as indices (m,) or points (m,3), which may be integers too
+        columns = [np.asarray(c) for c in columns]
+        self.Count = len(columns[0])
+        if all(c.ndim == 1 and np.issubdtype(c.dtype,np.integer) for c in columns):
+            self.PPos = None
+            self.PIndex = np.concatenate(columns).astype(np.int64)
+        else:
+            self.PPos = np.concatenate([c.reshape(-1,3) for c in columns]).astype(np.float64)
+            self.PIndex = None
+
+        # Make move and weighting arrays, column by column
+        size = self.Count * len(columns)
+        self.Move = np.zeros((size,3))
+        self.Weighting = np.tile(np.broadcast_to(np.asarray(weighting,dtype=np.float64),(self.Count,)),len(columns))
+        self.Name = None
+
+    def column(self,i):
+
+        """ Return the particle indices of column i """
+
+        return self.PIndex[i * self.Count:(i + 1) * self.Count]
+
+    def select(self,indices):
+
+        """ Return a new group holding copies of the goals at indices """
+
+        indices = np.asarray(indices,dtype=np.int64)
+        part = copy.copy(self)
+        slots = len(self.Weighting) // self.Count
+        rows = (np.arange(slots)[:,None] * self.Count + indices).ravel()
+        part.Count = len(indices)
+        part.PIndex = None if self.PIndex is None else self.PIndex[rows]
+        part.PPos = None if self.PPos is None else self.PPos[rows]
+        part.Move = self.Move[rows]
+        part.Weighting = self.Weighting[rows]
+        for name in self.Parameters:
+            setattr(part,name,getattr(self,name)[indices])
+        return part
+
+    def take(self,start,stop):
+
+        """ Return a new group holding copies of goals start to stop """
+
+        return self.select(np.arange(start,stop))
+
+    def __len__(self):
+        return self.Count
+
+    def __getitem__(self,index):
+        if index < 0:
+            index += self.Count
+        if not 0 <= index < self.Count:
+            raise IndexError("Goal index out of range")
+        return GoalHandle(self,index)
+
+    def __iter__(self):
+        for i in range(self.Count):
+            yield GoalHandle(self,i)
+
+class SpringGroup(GoalGroup):
+
+    """ Many springs between start and end particles, see Spring """
+
+    Parameters = ("RestLength",)
+
+    def __init__(self,starts,ends,restLengths,strengths):
+
+        GoalGroup.__init__(self,[starts,ends],strengths)
+        self.RestLength = np.broadcast_to(np.asarray(restLengths,dtype=np.float64),(self.Count,)).copy()
+
+    def Calculate(self,p):
+        m = self.Count
+        current = p[self.column(1)] - p[self.column(0)]
+        length = np.sqrt(np.einsum("ij,ij->i",current,current))
+        safe = np.where(length > 0.0,length,1.0)
+        factor = np.where(length > 0.0,0.5 * (1.0 - self.RestLength / safe),0.0)
+        springMove = current * factor[:,None]
+        self.Move[:m] = springMove
+        self.Move[m:] = -springMove
+
+    def OutputIndices(self):
+        return np.stack((self.column(0),self.column(1)),axis=1)
+
+class AnchorGroup(GoalGroup):
+
+    """ Pull many particles to their target points, see Anchor """
+
+    Parameters = ("Target",)
+
+    def __init__(self,points,targets,strengths=None):
+
+        # Support both AnchorGroup(points,strengths) and AnchorGroup(indices,targets,strengths)
+        if strengths is None:
+            targets,strengths = points,targets
+        GoalGroup.__init__(self,[points],strengths)
+        self.Target = np.array(targets,dtype=np.float64).reshape(-1,3)
+
+    def Calculate(self,p):
+        self.Move[:] = self.Target - p[self.PIndex]
+
+class LoadGroup(GoalGroup):
+
+    """ Apply constant force vectors to many particles, see Load """
+
+    def __init__(self,points,forces):
+
+        GoalGroup.__init__(self,[points],1.0)
+        self.Move[:] = np.asarray(forces,dtype=np.float64).reshape(-1,3)
+
+class OnPlaneGroup(GoalGroup):
+
+    """ Pull many particles onto a plane, replicates ks.Goals.OnPlane """
+
+    def __init__(self,points,origin,normal,strengths):
+
+        GoalGroup.__init__(self,[points],strengths)
+        self.Origin = np.array(origin,dtype=np.float64)
+        normal = np.array(normal,dtype=np.float64)
+        self.Normal = normal / np.sqrt(normal.dot(normal))
+
+    def Calculate(self,p):
+        dist = (p[self.PIndex] - self.Origin).dot(self.Normal)
+        self.Move[:] = -dist[:,None] * self.Normal
+
+class AngleGroup(GoalGroup):
+
+    """ Rotate many line pairs towards a rest angle, replicates ks.Goals.Angle """
+
+    Parameters = ("RestAngle",)
+
+    def __init__(self,aStarts,aEnds,bStarts,bEnds,restAngles,strengths):
+
+        GoalGroup.__init__(self,[aStarts,aEnds,bStarts,bEnds],strengths)
+        self.RestAngle = np.broadcast_to(np.asarray(restAngles,dtype=np.float64),(self.Count,)).copy()
+
+    def Calculate(self,p):
+
+        # Get the line end points and direction vectors
+        m = self.Count
+        a0,a1,b0,b1 = [p[self.column(i)] for i in range(4)]
+        dA = a1 - a0
+        dB = b1 - b0
+
+        # Calculate the current angles and the rotation axes
+        lA = np.sqrt(np.einsum("ij,ij->i",dA,dA))
+        lB = np.sqrt(np.einsum("ij,ij->i",dB,dB))
+        axis = np.cross(dA,dB)
+        lAxis = np.sqrt(np.einsum("ij,ij->i",axis,axis))
+        valid = lAxis > 1e-12 * lA * lB
+        safe = np.where(valid,lAxis,1.0)
+        axis /= safe[:,None]
+        cosAngle = np.einsum("ij,ij->i",dA,dB) / np.where(valid,lA * lB,1.0)
+        angle = np.arccos(np.clip(cosAngle,-1.0,1.0))
+
+        # Rotate each line about its midpoint by half the angle error
+        half = np.where(valid,0.5 * (angle - self.RestAngle),0.0)[:,None]
+        rA = dA * np.cos(half) + np.cross(axis,dA) * np.sin(half)
+        rB = dB * np.cos(half) - np.cross(axis,dB) * np.sin(half)
+        self.Move[:m] = 0.5 * (dA - rA)
+        self.Move[m:2 * m] = 0.5 * (rA - dA)
+        self.Move[2 * m:3 * m] = 0.5 * (dB - rB)
+        self.Move[3 * m:] = 0.5 * (rB - dB)
@@ -0,0 +1,160 @@
+﻿"""
+Implicit (Newton) solve mode for stiff headless models such as the calibrated
+bar, cable, rod, load and support goals in HeadlessStructural. The residual is
+the weighted sum of all goal moves per particle (zero at equilibrium), and its
+sparse Jacobian is assembled from finite differences of each goal's moves on a
+local copy of its particles. Steps are damped Levenberg-Marquardt style and
+solved with SciPy sparse LU, so stiff models converge in tens of iterations
+from a shape near equilibrium and in one to two hundred from a flat one, where the
+explicit solver stops with large forces left (see BenchmarkNewtonSolve).
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import numpy as np
+import HeadlessSolver as hs
+try:
+    import scipy.sparse as sp
+    import scipy.sparse.linalg as spla
+except ImportError:
+    sp = None
+
+def calcResidual(goals,p):
+
+    """ Sum the weighted moves of all goals per particle, returns a (n,3) array """
+
+    residual = np.zeros_like(p)
+    for g in goals:
+        g.Calculate(p)
+        hs.scatterAdd(residual,g.PIndex,g.Move * g.Weighting[:,None])
+    return residual
+
+def goalJacobian(g,p,h):
+
+    """ Differentiate the weighted moves of a goal, returns sparse (row,col,value) entries """
+
+    # Evaluate the goal on a local copy of its particles, so every goal in a group can be perturbed at once
+    pIndex = g.PIndex
+    size = len(pIndex)
+    count = getattr(g,"Count",1)
+    slots = size // count
+    local = p[pIndex]
+    g.PIndex = np.arange(size)
+    rows = []
+    cols = []
+    values = []
+    try:
+        for s in range(slots):
+            for a in range(3):
+
+                # Central difference of the weighted moves for coordinate a of slot s
+                local[s * count:(s + 1) * count,a] += h
+                g.Calculate(local)
+                forward = g.Move * g.Weighting[:,None]
+                local[s * count:(s + 1) * count,a] -= 2.0 * h
+                g.Calculate(local)
+                derivative = (forward - g.Move * g.Weighting[:,None]) / (2.0 * h)
+                local[s * count:(s + 1) * count,a] += h
+
+                # Every slot of goal j depends on slot s of goal j
+                perturbed = pIndex[s * count + np.arange(size) % count]
+                for b in range(3):
+                    rows.append(3 * pIndex + b)
+                    cols.append(3 * perturbed + a)
+                    values.append(derivative[:,b])
+    finally:
+        g.PIndex = pIndex
+    return np.concatenate(rows),np.concatenate(cols),np.concatenate(values)
+
+def assembleJacobian(goals,p,h):
+
+    """ Assemble the sparse (3n,3n) Jacobian of the residual """
+
+    rows = []
+    cols = []
+    values = []
+    for g in goals:
+        if not np.any(g.Weighting):
+            continue
+        r,c,v = goalJacobian(g,p,h)
+        nonZero = v != 0.0
+        rows.append(r[nonZero])
+        cols.append(c[nonZero])
+        values.append(v[nonZero])
+    size = 3 * len(p)
+    if not rows:
+        return sp.csc_matrix((size,size))
+    return sp.csc_matrix((np.concatenate(values),(np.concatenate(rows),np.concatenate(cols))),shape=(size,size))
+
+def newtonSolve(ps,goals,maxIterations=500,forceTolerance=1e-6,moveTolerance=1e-12,maxRetries=20,maxHalvings=10):
+
+    """ Solve a system to equilibrium with damped Newton steps, returns a SolveTrace. Only the force tolerance counts
+    as converged, steps below the move tolerance (relative to the model size) with forces left are reported as stalled """
+
+    if sp is None:
+        raise ImportError("newtonSolve requires SciPy")
+
+    # Finite difference step and move tolerance relative to the model size
+    trace = hs.SolveTrace()
+    p = ps.GetPositions()
+    size = max(1.0,float(np.abs(p).max())) if len(p) else 1.0
+    h = 1e-7 * size
+    minStep = moveTolerance * size
+    residual = calcResidual(goals,p)
+    norm = float(np.sqrt(np.einsum("ij,ij->",residual,residual)))
+    damping = None
+    while True:
+
+        # Stop when the largest particle force is below the tolerance
+        trace.residuals.append(norm)
+        if np.abs(residual).max() < forceTolerance:
+            trace.reason = "forceTolerance"
+            trace.converged = True
+            break
+        if trace.iterations >= maxIterations:
+            trace.reason = "maxIterations"
+            break
+
+        # Assemble the Jacobian, damping starts tiny relative to its diagonal
+        jacobian = assembleJacobian(goals,p,h)
+        if damping is None:
+            damping = 1e-9 * max(1.0,float(np.abs(jacobian.diagonal()).max()))
+        identity = sp.identity(jacobian.shape[0],format="csc")
+
+        # Solve damped Newton steps, backtracking along each, until one lowers the residual
+        accepted = False
+        for retry in range(maxRetries):
+            newtonStep = spla.spsolve(damping * identity - jacobian,residual.ravel()).reshape(-1,3)
+            for halving in range(maxHalvings):
+                step = newtonStep * 0.5 ** halving
+                trial = p + step
+                trialResidual = calcResidual(goals,trial)
+                trialNorm = float(np.sqrt(np.einsum("ij,ij->",trialResidual,trialResidual)))
+                if np.isfinite(trialNorm) and trialNorm < norm:
+                    accepted = True
+                    break
+            if accepted:
+                damping *= 0.3
+                break
+            damping *= 10.0
+        if not accepted:
+            trace.reason = "stalled"
+            break
+
+        # Take the step
+        p,residual,norm = trial,trialResidual,trialNorm
+        stepSq = float(np.einsum("ij,ij->",step,step))
+        trace.vSums.append(stepSq)
+        trace.dampings.append(damping)
+        trace.iterations += 1
+
+        # Tiny steps with forces left mean the damping has stalled the solve, not that it converged
+        if stepSq < minStep * minStep and np.abs(residual).max() >= forceTolerance:
+            trace.residuals.append(norm)
+            trace.reason = "stalled"
+            break
+
+    ps.SetPositions(p)
+    return trace
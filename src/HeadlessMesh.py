@@ -0,0 +1,199 @@
+﻿"""
+Bulk mesh ingestion for the headless solver, the vectorized equivalent of the
+per vertex and per edge loops in TensileRelaxScript. Meshes are given as a
+(n,3) vertex array and faces, either as a (m,k) index array or as ragged face
+indices with offsets (as read from OBJ/PLY files with mixed face sizes). The
+topology vertices (coincident vertices welded), edges and naked vertices are
+found with array operations, and the relaxed topology vertex positions are
+written back to the mesh vertices in one array copy.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import numpy as np
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+
+def raggedFaces(faces):
+
+    """ Convert a (m,k) face array or a list of face index lists to flat indices and offsets """
+
+    if isinstance(faces,np.ndarray) and faces.ndim == 2:
+        indices = faces.astype(np.int64).ravel()
+        offsets = np.arange(len(faces) + 1) * faces.shape[1]
+        return indices,offsets
+    sizes = np.array([len(f) for f in faces],dtype=np.int64)
+    offsets = np.concatenate(([0],np.cumsum(sizes)))
+    indices = np.fromiter((i for f in faces for i in f),np.int64,int(offsets[-1]))
+    return indices,offsets
+
+def faceEdges(indices,offsets):
+
+    """ Get the (start,end) vertex indices of every face side of ragged faces """
+
+    # The next vertex of each face vertex, wrapping around at the end of its face
+    nexts = np.arange(len(indices)) + 1
+    nexts[offsets[1:] - 1] = offsets[:-1]
+    return np.stack((indices,indices[nexts]),axis=1)
+
+class MeshTopology(object):
+
+    """ The topology vertices, edges and naked vertices of a mesh """
+
+    def __init__(self,vertices,faces,tolerance=None):
+
+        # Weld coincident vertices if a tolerance is given, like the mesh topology vertices
+        vertices = np.asarray(vertices,dtype=np.float64).reshape(-1,3)
+        if isinstance(faces,tuple):
+            indices,offsets = faces
+        else:
+            indices,offsets = raggedFaces(faces)
+        if tolerance is None:
+            parents = np.arange(len(vertices))
+        else:
+            parents = hs.mergePoints(vertices,tolerance)
+        topologyIds,self.VertexTopology = np.unique(parents,return_inverse=True)
+        self.VertexTopology = self.VertexTopology.ravel()
+        self.Vertices = vertices[topologyIds]
+
+        # Sort the face sides into unique edges, skipping the collapsed sides of triangles stored as quads (C == D)
+        # or of vertices welded together, an edge used by only one face is naked
+        sides = self.VertexTopology[faceEdges(np.asarray(indices,dtype=np.int64),np.asarray(offsets,dtype=np.int64))]
+        sides = sides[sides[:,0] != sides[:,1]]
+        count = len(self.Vertices)
+        keys,faceCounts = np.unique(sides.min(axis=1) * count + sides.max(axis=1),return_counts=True)
+        self.Edges = np.stack((keys // count,keys % count),axis=1)
+        self.Naked = np.zeros(len(self.Vertices),dtype=bool)
+        self.Naked[self.Edges[faceCounts == 1].ravel()] = True
+
+    def makeSystem(self,anchorStrength=10000.0,restLength=0.0,springStrength=1.0):
+
+        """ Make a system with a particle per topology vertex, anchors at naked vertices and edge springs """
+
+        ps = hs.PhysicalSystem()
+        ps.AddParticles(self.Vertices)
+        naked = np.flatnonzero(self.Naked)
+        goals = [hg.AnchorGroup(naked,self.Vertices[naked],anchorStrength),
+                 hg.SpringGroup(self.Edges[:,0],self.Edges[:,1],restLength,springStrength)]
+        return ps,goals
+
+    def writeBack(self,ps,vertices):
+
+        """ Write the particle positions of ps to the mesh vertices array in place """
+
+        np.take(ps.GetPositionsView(),self.VertexTopology,axis=0,out=vertices)
+
+def readOBJ(path):
+
+    """ Read the vertices (n,3) and ragged faces (indices,offsets) of an OBJ file """
+
+    with open(path) as f:
+        lines = f.read().splitlines()
+
+    # Vertices, ignoring any w coordinates
+    vertexLines = [l.split()[1:4] for l in lines if l.startswith("v ")]
+    vertices = np.array(vertexLines,dtype=np.float64).reshape(-1,3)
+
+    # Faces, keeping the vertex index of each v/vt/vn corner and resolving negative (relative) indices
+    faceLines = [l.split()[1:] for l in lines if l.startswith("f ")]
+    sizes = np.array([len(f) for f in faceLines],dtype=np.int64)
+    indices = np.array([c.split("/",1)[0] for f in faceLines for c in f],dtype=np.int64)
+    indices = np.where(indices < 0,len(vertices) + indices,indices - 1)
+    return vertices,(indices,np.concatenate(([0],np.cumsum(sizes))))
+
+def readPLY(path):
+
+    """ Read the vertices (n,3) and ragged faces (indices,offsets) of an ascii or binary little endian PLY file """
+
+    with open(path,"rb") as f:
+
+        # Parse the header for the element counts and the vertex properties
+        header = []
+        while True:
+            line = f.readline()
+            if not line:
+                raise ValueError("PLY file %s has no end_header" % path)
+            line = line.decode("ascii").strip()
+            if line:
+                header.append(line.split())
+            if line == "end_header":
+                break
+        data = f.read()
+
+    # Elements in file order as (name,count,properties), with properties as (name,type) and list types as (count type,item type)
+    fileFormat = [h[1] for h in header if h[0] == "format"][0]
+    elements = []
+    for h in header:
+        if h[0] == "element":
+            elements.append((h[1],int(h[2]),[]))
+        elif h[0] == "property" and elements:
+            if h[1] == "list":
+                elements[-1][2].append((h[4],(h[2],h[3])))
+            else:
+                elements[-1][2].append((h[2],h[1]))
+
+    # Only vertices then faces are read, so other elements must come after them
+    names = [e[0] for e in elements]
+    if names[:1] != ["vertex"] or ("face" in names and names.index("face") != 1):
+        raise ValueError("PLY file %s must start with its vertex and face elements" % path)
+    vertexCount,vertexProperties = elements[0][1:]
+    faceCount,faceProperties = elements[1][1:] if "face" in names else (0,[])
+    if any(isinstance(kind,tuple) for name,kind in vertexProperties):
+        raise ValueError("PLY vertex list properties are not supported")
+    lists = [i for i,(name,kind) in enumerate(faceProperties) if isinstance(kind,tuple)]
+    if faceCount and (len(lists) != 1 or faceProperties[lists[0]][0] not in ("vertex_indices","vertex_index")):
+        raise ValueError("PLY faces must have a single vertex_indices list property")
+    xyz = [[name for name,kind in vertexProperties].index(axis) for axis in "xyz"]
+    listIndex = lists[0] if lists else 0
+
+    # Ascii: one vertex then one face per line, skipping the face properties around the index list
+    if fileFormat == "ascii":
+        lines = data.decode("ascii").split("\n")
+        vertices = np.array([l.split() for l in lines[:vertexCount]],dtype=np.float64)[:,xyz]
+        sizes = np.zeros(faceCount,dtype=np.int64)
+        indices = []
+        for k,l in enumerate(lines[vertexCount:vertexCount + faceCount]):
+            tokens = l.split()
+            sizes[k] = int(tokens[listIndex])
+            indices.extend(tokens[listIndex + 1:listIndex + 1 + sizes[k]])
+        return vertices,(np.array(indices,dtype=np.int64),np.concatenate(([0],np.cumsum(sizes))))
+
+    # Binary: a record array of vertices, then the face records
+    if fileFormat != "binary_little_endian":
+        raise ValueError("Unsupported PLY format %s" % fileFormat)
+    types = {"char":"i1","uchar":"u1","short":"<i2","ushort":"<u2","int":"<i4","uint":"<u4","float":"<f4","double":"<f8",
+             "int8":"i1","uint8":"u1","int16":"<i2","uint16":"<u2","int32":"<i4","uint32":"<u4","float32":"<f4","float64":"<f8"}
+    kinds = [kind for name,kind in vertexProperties] + [k for name,kind in faceProperties for k in (kind if isinstance(kind,tuple) else (kind,))]
+    unknown = [kind for kind in kinds if kind not in types]
+    if unknown:
+        raise ValueError("Unsupported PLY property type %s" % unknown[0])
+    vertexType = np.dtype([(name,types[kind]) for name,kind in vertexProperties])
+    records = np.frombuffer(data,vertexType,vertexCount)
+    vertices = np.stack([records[axis].astype(np.float64) for axis in "xyz"],axis=1)
+    faceData = data[vertexCount * vertexType.itemsize:]
+    if not faceCount:
+        return vertices,raggedFaces(np.zeros((0,3),dtype=np.int64))
+
+    # The face properties before and after the index list, and the list count and index types
+    before = np.dtype([(name,types[kind]) for name,kind in faceProperties[:listIndex]])
+    after = np.dtype([(name,types[kind]) for name,kind in faceProperties[listIndex + 1:]])
+    countType,indexType = [np.dtype(types[kind]) for kind in faceProperties[listIndex][1]]
+
+    # Read faces of a single size in one go, otherwise face by face
+    first = int(np.frombuffer(faceData,countType,1,before.itemsize)[0])
+    uniform = np.dtype([("before",before),("n",countType),("i",indexType,(first,)),("after",after)])
+    if len(faceData) >= faceCount * uniform.itemsize:
+        faces = np.frombuffer(faceData,uniform,faceCount)
+        if np.all(faces["n"] == first):
+            return vertices,raggedFaces(faces["i"].astype(np.int64))
+    faces = []
+    position = 0
+    for i in range(faceCount):
+        position += before.itemsize
+        size = int(np.frombuffer(faceData,countType,1,position)[0])
+        position += countType.itemsize
+        faces.append(np.frombuffer(faceData,indexType,size,position))
+        position += indexType.itemsize * size + after.itemsize
+    return vertices,raggedFaces(faces)
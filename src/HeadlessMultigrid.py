@@ -0,0 +1,223 @@
+﻿"""
+Multigrid relaxation of line networks and meshes for the headless solver, e.g.
+the cable networks of RelaxCableNetworkIntoPlane or the meshes relaxed by
+TensileRelaxScript. The network is coarsened by repeatedly aggregating its
+nodes around an independent set of seed nodes. Each V-cycle relaxes a level a
+few iterations, solves the coarser levels for a correction (full approximation
+scheme, so any goals work) and prolongates it back, so low frequency shape
+errors are removed on the small coarse levels instead of propagating one edge
+per iteration through the full network.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import numpy as np
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+import HeadlessStructural as hst
+
+class NetworkLevel(object):
+
+    """ The nodes and edges of one level of a network hierarchy """
+
+    def __init__(self,points,edges,restLengths,stiffnesses,fixed,counts):
+
+        self.Points = points
+        self.Edges = edges
+        self.RestLengths = restLengths
+        self.Stiffnesses = stiffnesses
+        self.Fixed = fixed
+        self.Counts = counts
+        self.Parents = None
+
+    def __len__(self):
+        return len(self.Points)
+
+def aggregateNodes(edges,count,fixed,seed=0):
+
+    """ Aggregate free nodes around a maximal independent set of seeds, returns the seed node of each node """
+
+    # Seeds are an independent set of the free nodes, fixed nodes stay on their own
+    free = ~np.asarray(fixed,dtype=bool)
+    freeEdges = edges[free[edges[:,0]] & free[edges[:,1]] & (edges[:,0] != edges[:,1])]
+    seeds = (hs.colourGraph(freeEdges,count,seed) == 0) & free
+
+    # Every other free node has a seed neighbour, join the one of lowest index
+    parents = np.arange(count)
+    joined = np.full(count,count)
+    a,b = freeEdges.T
+    np.minimum.at(joined,a[seeds[b]],b[seeds[b]])
+    np.minimum.at(joined,b[seeds[a]],a[seeds[a]])
+    members = free & ~seeds & (joined < count)
+    parents[members] = joined[members]
+    return parents
+
+def coarsenLevel(level):
+
+    """ Aggregate the nodes of a level, returns the coarser level """
+
+    # Number the coarse nodes and average the positions of their fine nodes
+    parents = aggregateNodes(level.Edges,len(level),level.Fixed)
+    nodes,parents = np.unique(parents,return_inverse=True)
+    counts = np.bincount(parents,level.Counts)
+    points = np.stack([np.bincount(parents,level.Points[:,k] * level.Counts) for k in range(3)],axis=1) / counts[:,None]
+    fixed = np.bincount(parents,level.Fixed,minlength=len(nodes)) > 0
+    level.Parents = parents
+
+    # Merge the fine edges between each pair of coarse nodes
+    edges = np.sort(parents[level.Edges],axis=1)
+    keep = edges[:,0] != edges[:,1]
+    edges,edgeIds = np.unique(edges[keep],axis=0,return_inverse=True)
+    edgeIds = edgeIds.ravel()
+
+    # Scale the coarse edge lengths by the mean rest to current length ratio of their fine edges
+    fineLengths = hst.segmentLengths(level.Points[level.Edges[keep,0]],level.Points[level.Edges[keep,1]])
+    ratios = np.where(fineLengths > 0.0,level.RestLengths[keep] / np.where(fineLengths > 0.0,fineLengths,1.0),1.0)
+    ratios = np.bincount(edgeIds,ratios,minlength=len(edges)) / np.bincount(edgeIds,minlength=len(edges))
+    lengths = hst.segmentLengths(points[edges[:,0]],points[edges[:,1]])
+    stiffnesses = np.bincount(edgeIds,level.Stiffnesses[keep] * fineLengths,minlength=len(edges)) / np.where(lengths > 0.0,lengths,1.0)
+    return NetworkLevel(points,edges,lengths * ratios,stiffnesses,fixed,counts)
+
+def buildHierarchy(points,edges,restLengths=None,fixed=None,minNodes=1000,maxLevels=20):
+
+    """ Coarsen a network until it has fewer than minNodes nodes, returns its levels from fine to coarse """
+
+    # Rest lengths default to the edge lengths, and no nodes are fixed
+    points = np.asarray(points,dtype=np.float64).reshape(-1,3)
+    edges = np.asarray(edges,dtype=np.int64).reshape(-1,2)
+    if restLengths is None:
+        restLengths = hst.segmentLengths(points[edges[:,0]],points[edges[:,1]])
+    restLengths = np.broadcast_to(np.asarray(restLengths,dtype=np.float64),(len(edges),)).copy()
+    if fixed is None:
+        fixed = np.zeros(len(points),dtype=bool)
+    fixed = np.asarray(fixed)
+    if fixed.dtype != bool:
+        mask = np.zeros(len(points),dtype=bool)
+        mask[fixed] = True
+        fixed = mask
+
+    # Stop coarsening when a level no longer shrinks by a fifth
+    levels = [NetworkLevel(points,edges,restLengths,np.ones(len(edges)),fixed,np.ones(len(points)))]
+    while len(levels[-1]) > minNodes and len(levels) < maxLevels:
+        coarse = coarsenLevel(levels[-1])
+        if len(coarse) > 0.8 * len(levels[-1]):
+            levels[-1].Parents = None
+            break
+        levels.append(coarse)
+    return levels
+
+def networkGoals(level,strength=1.0,anchorStrength=10000.0,load=None):
+
+    """ Make springs along the edges, anchors at the fixed nodes and a load per node of a level """
+
+    # Coarse nodes carry the load of all the nodes they aggregate
+    goals = [hg.SpringGroup(level.Edges[:,0],level.Edges[:,1],level.RestLengths,strength * level.Stiffnesses)]
+    fixed = np.flatnonzero(level.Fixed)
+    if len(fixed):
+        goals.append(hg.AnchorGroup(fixed,level.Points[fixed],anchorStrength))
+    if load is not None:
+        free = np.flatnonzero(~level.Fixed)
+        goals.append(hg.LoadGroup(free,level.Counts[free,None] * np.asarray(load,dtype=np.float64)))
+    return goals
+
+def levelResidual(goals,p):
+
+    """ Sum the weighted moves of goals per particle, zero at equilibrium """
+
+    moveSum = np.zeros_like(p)
+    hs.sumGoals(goals,p,moveSum,np.zeros(len(p)))
+    return moveSum
+
+def restrictPositions(level,coarse,p):
+
+    """ Average the positions of the nodes of level onto the nodes of the coarser level """
+
+    return np.stack([np.bincount(level.Parents,p[:,k] * level.Counts,minlength=len(coarse)) for k in range(3)],axis=1) / coarse.Counts[:,None]
+
+def restrictForces(level,coarse,f):
+
+    """ Sum the forces of the nodes of level onto the nodes of the coarser level """
+
+    return np.stack([np.bincount(level.Parents,f[:,k],minlength=len(coarse)) for k in range(3)],axis=1)
+
+def prolongate(level,delta):
+
+    """ Interpolate coarse node displacements to the nodes of level, averaged with their neighbours """
+
+    delta = delta[level.Parents]
+    a,b = level.Edges.T
+    degrees = np.bincount(a,minlength=len(level)) + np.bincount(b,minlength=len(level))
+    neighbours = np.stack([np.bincount(a,delta[b,k],len(level)) + np.bincount(b,delta[a,k],len(level)) for k in range(3)],axis=1)
+    smooth = ~level.Fixed & (degrees > 0)
+    delta[smooth] = 0.5 * delta[smooth] + 0.5 * neighbours[smooth] / degrees[smooth,None]
+    return delta
+
+def relax(ps,goals,iterations,threshold):
+
+    """ Step a system up to iterations times, or until it drops below the threshold """
+
+    for i in range(iterations):
+        ps.Step(goals,False,threshold)
+        if ps.GetvSum() < threshold:
+            break
+
+def vCycle(levels,systems,goals,k,smoothing,coarseIterations,threshold,maxHalvings=4):
+
+    """ Relax level k and correct it from the coarser levels, full approximation scheme style """
+
+    # Smooth out the short wavelength errors of this level
+    ps = systems[k]
+    relax(ps,goals[k],smoothing,threshold)
+    if k == len(levels) - 1:
+        relax(ps,goals[k],coarseIterations,threshold)
+        return
+
+    # Restrict the positions, and offset the coarse goals by the restricted residual of this level
+    coarse = levels[k + 1]
+    p = ps.GetPositions()
+    coarseStart = restrictPositions(levels[k],coarse,p)
+    systems[k + 1].SetPositions(coarseStart)
+    residual = levelResidual(goals[k],p)
+    goals[k + 1][-1].Move[:] = restrictForces(levels[k],coarse,residual) - levelResidual(goals[k + 1][:-1],coarseStart)
+
+    # Solve the coarser levels and prolongate their correction
+    vCycle(levels,systems,goals,k + 1,smoothing,coarseIterations,threshold,maxHalvings)
+    correction = prolongate(levels[k],systems[k + 1].GetPositions() - coarseStart)
+
+    # Halve the correction until it lowers the smoothed residual, large rotations are poorly prolongated
+    norm = np.abs(residual).sum()
+    for halving in range(maxHalvings):
+        ps.SetPositions(p + correction)
+        relax(ps,goals[k],smoothing,threshold)
+        if np.abs(levelResidual(goals[k],ps.GetPositions())).sum() < norm:
+            return
+        correction *= 0.5
+    ps.SetPositions(p)
+    relax(ps,goals[k],smoothing,threshold)
+
+def multigridSolve(levels,makeGoals=networkGoals,threshold=1e-13,maxCycles=100,smoothing=10,coarseIterations=200):
+
+    """ Solve the finest level with multigrid V-cycles, returns its system, its goals and the cycles taken """
+
+    # makeGoals(level) makes index based goals for any level, with loads scaled by level.Counts
+    # Make a system per level, coarse levels get an extra load goal for the residual offsets
+    systems = []
+    goals = []
+    for k,level in enumerate(levels):
+        ps = hs.PhysicalSystem()
+        ps.AddParticles(level.Points)
+        systems.append(ps)
+        goals.append(makeGoals(level))
+        if k:
+            goals[-1].append(hg.LoadGroup(np.arange(len(level)),np.zeros((len(level),3))))
+
+    # Cycle until the finest system drops below the threshold
+    cycles = 0
+    while cycles < maxCycles:
+        vCycle(levels,systems,goals,0,smoothing,coarseIterations,threshold)
+        cycles += 1
+        if systems[0].GetvSum() < threshold:
+            break
+    return systems[0],goals[0],cycles
@@ -0,0 +1,236 @@
+﻿"""
+Line network helpers for the headless solver, the vectorized equivalents of the
+per node loops in RelaxCableNetworkIntoPlane. The network adjacency is stored
+in compressed sparse row (CSR) arrays, where the neighbours of node i are
+indices[indptr[i]:indptr[i+1]], so the goals of all nodes can be made at once.
+NetworkGraph wraps these arrays with the node points and edge weights as a
+compact replacement for the NetworkX graph made by linesToGraph.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import numpy as np
+import PointMap as pm
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+try:
+    import networkx as nx
+except ImportError:
+    nx = None
+
+def csrAdjacency(edges,count):
+
+    """ Make the CSR adjacency arrays (indptr,indices,edgeIds) of count nodes connected by (m,2) edges """
+
+    # Every edge is a neighbour of both its nodes, sorted by node
+    edges = np.asarray(edges,dtype=np.int64).reshape(-1,2)
+    nodes = np.concatenate((edges[:,0],edges[:,1]))
+    neighbours = np.concatenate((edges[:,1],edges[:,0]))
+    order = np.argsort(nodes,kind="stable")
+    indptr = np.concatenate(([0],np.cumsum(np.bincount(nodes,minlength=count))))
+    return indptr,neighbours[order],order % len(edges) if len(edges) else order
+
+def endValences(starts,ends,tolerance=0.000001):
+
+    """ Count the line ends at the start and end point of every line, with points quantized to tolerance """
+
+    # Quantize the line ends to integer cells and count the ends sharing a cell
+    pts = np.concatenate((starts,ends))
+    cells = np.round(pts / tolerance).astype(np.int64)
+    keys = hs.cellKeys(cells)(cells)
+    cellIds,inverse,counts = np.unique(keys,return_inverse=True,return_counts=True)
+    valences = counts[inverse.ravel()]
+    return valences[:len(starts)],valences[len(starts):]
+
+def openDegreeTwoNodes(starts,ends,angle,tolerance=0.000001):
+
+    """ Rotate the lines starting at degree two nodes by angle (degrees) about the Z-axis at their end, replicates openDegreeTwoNodes """
+
+    starts = np.array(starts,dtype=np.float64).reshape(-1,3)
+    ends = np.asarray(ends,dtype=np.float64).reshape(-1,3)
+    if not len(starts):
+        return starts,ends
+
+    # Rotate the start points of the lines whose start is shared by exactly two line ends
+    rotate = endValences(starts,ends,tolerance)[0] == 2
+    a = np.radians(angle)
+    rotation = np.array([[np.cos(a),-np.sin(a),0.0],[np.sin(a),np.cos(a),0.0],[0.0,0.0,1.0]])
+    starts[rotate] = ends[rotate] + (starts[rotate] - ends[rotate]).dot(rotation.T)
+    return starts,ends
+
+def nodePlanes(points,indptr,indices):
+
+    """ Fit a plane to the neighbours of every node, returns the (n,3) X-axes and normals """
+
+    # Centre the neighbour points on their mean per node
+    count = len(indptr) - 1
+    owners = np.repeat(np.arange(count),np.diff(indptr))
+    degrees = np.maximum(np.diff(indptr),1)[:,None]
+    neighbourPts = points[indices]
+    centres = np.stack([np.bincount(owners,neighbourPts[:,k],count) for k in range(3)],axis=1) / degrees
+    offsets = neighbourPts - centres[owners]
+
+    # The principal axes of the covariance, the X-axis is the largest and the normal the smallest
+    covariance = np.empty((count,3,3))
+    for a in range(3):
+        for b in range(a,3):
+            covariance[:,a,b] = covariance[:,b,a] = np.bincount(owners,offsets[:,a] * offsets[:,b],count)
+    values,vectors = np.linalg.eigh(covariance)
+    return vectors[:,:,2],vectors[:,:,0]
+
+def sortNeighbours(points,indptr,indices):
+
+    """ Sort the neighbours of every node radially around it, returns the sorted CSR indices """
+
+    # Angle of each neighbour in the plane fitted to the neighbours of its node
+    count = len(indptr) - 1
+    owners = np.repeat(np.arange(count),np.diff(indptr))
+    xAxes,normals = nodePlanes(points,indptr,indices)
+    yAxes = np.cross(normals,xAxes)
+    vectors = points[indices] - points[owners]
+    angles = np.arctan2(np.einsum("ij,ij->i",vectors,yAxes[owners]),np.einsum("ij,ij->i",vectors,xAxes[owners]))
+
+    # Sort by node, then by angle
+    return indices[np.lexsort((angles,owners))]
+
+def angleGoals(points,indptr,indices,strength):
+
+    """ Keep the angles between consecutive neighbours of every node at their ideal, replicates makeAngleGoals """
+
+    # Pair each sorted neighbour with the next one around its node, on nodes with more than one neighbour
+    count = len(indptr) - 1
+    degrees = np.diff(indptr)
+    owners = np.repeat(np.arange(count),degrees)
+    sortedIndices = sortNeighbours(points,indptr,indices)
+    nexts = np.arange(len(indices)) + 1
+    nexts[indptr[1:][degrees > 0] - 1] = indptr[:-1][degrees > 0]
+    keep = degrees[owners] > 1
+
+    # The lines run from the neighbours to the node, at an ideal angle of a full turn over the node degree
+    ideal = 2.0 * np.pi / degrees[owners[keep]]
+    return hg.AngleGroup(sortedIndices[keep],owners[keep],sortedIndices[nexts][keep],owners[keep],ideal,strength)
+
+class NetworkGraph(object):
+
+    """ Array backed line network graph with CSR adjacency, see linesToGraph """
+
+    def __init__(self,points,edges,weights=1.0):
+
+        # Node points, edges between node indices and one weight per edge
+        self.Points = np.asarray(points,dtype=np.float64).reshape(-1,3)
+        self.Edges = np.asarray(edges,dtype=np.int64).reshape(-1,2)
+        self.Weights = np.broadcast_to(np.asarray(weights,dtype=np.float64),(len(self.Edges),)).copy()
+        self.Indptr,self.Indices,self.EdgeIds = csrAdjacency(self.Edges,len(self.Points))
+
+    @classmethod
+    def fromLines(cls,starts,ends,edgeMode="metric",tolerance=0.000001):
+
+        """ Make a graph from lines given as start/end point arrays, matching the line ends to unique nodes """
+
+        # Weld the line ends within tolerance
+        starts = np.asarray(starts,dtype=np.float64).reshape(-1,3)
+        ends = np.asarray(ends,dtype=np.float64).reshape(-1,3)
+        linePts = np.concatenate((starts,ends))
+        nodeIds,lineNodes = np.unique(hs.mergePoints(linePts,tolerance),return_inverse=True)
+        edges = lineNodes.ravel().reshape(2,-1).T
+
+        # Weight the edges by their share of the total length (metric) or all equally (average)
+        lengths = np.sqrt(np.einsum("ij,ij->i",ends - starts,ends - starts))
+        if edgeMode == "metric":
+            weights = lengths / lengths.sum()
+        elif edgeMode == "average":
+            weights = 1.0 / len(lengths)
+        else:
+            raise ValueError("Unknown edge mode %s" % edgeMode)
+        return cls(linePts[nodeIds],edges,weights)
+
+    @classmethod
+    def fromNetworkX(cls,graph):
+
+        """ Make a graph from a NetworkX graph with point node attributes and (optional) weight edge attributes """
+
+        nodes = dict((n,i) for i,n in enumerate(graph.nodes()))
+        points = [pm.pointXYZ(data["point"]) for n,data in graph.nodes(data=True)]
+        edgeData = list(graph.edges(data=True))
+        edges = np.array([(nodes[a],nodes[b]) for a,b,data in edgeData],dtype=np.int64)
+        weights = np.array([data.get("weight",1.0) for a,b,data in edgeData],dtype=np.float64)
+        return cls(points,edges,weights)
+
+    def toNetworkX(self):
+
+        """ Make a NetworkX graph with point node attributes and weight/line edge attributes """
+
+        if nx is None:
+            raise ImportError("toNetworkX requires NetworkX")
+        graph = nx.Graph()
+        for i,pt in enumerate(self.Points.tolist()):
+            graph.add_node(i,point=tuple(pt))
+        lines = self.lines().tolist()
+        for (a,b),weight,line in zip(self.Edges.tolist(),self.Weights.tolist(),lines):
+            graph.add_edge(a,b,weight=weight,line=(tuple(line[0]),tuple(line[1])))
+        return graph
+
+    def __len__(self):
+        return len(self.Points)
+
+    def degrees(self):
+
+        """ Return the number of neighbours of every node """
+
+        return np.diff(self.Indptr)
+
+    def neighbours(self,node):
+
+        """ Return the indices of the neighbours of a node """
+
+        return self.Indices[self.Indptr[node]:self.Indptr[node + 1]]
+
+    def edgeWeight(self,a,b):
+
+        """ Return the weight of the edge between nodes a and b """
+
+        slots = np.flatnonzero(self.neighbours(a) == b)
+        if not len(slots):
+            raise KeyError("No edge between nodes %d and %d" % (a,b))
+        return self.Weights[self.EdgeIds[self.Indptr[a] + slots[0]]]
+
+    def lines(self):
+
+        """ Return the (m,2,3) start/end points of the edges """
+
+        return self.Points[self.Edges]
+
+    def edgeLengths(self):
+
+        """ Return the lengths of the edges """
+
+        vectors = self.Points[self.Edges[:,1]] - self.Points[self.Edges[:,0]]
+        return np.sqrt(np.einsum("ij,ij->i",vectors,vectors))
+
+    def makeSystem(self):
+
+        """ Make a system with a particle per node """
+
+        ps = hs.PhysicalSystem()
+        ps.AddParticles(self.Points)
+        return ps
+
+    def springGoals(self,strength):
+
+        """ Keep each edge its original length, replicates makeSpringGoals """
+
+        return hg.SpringGroup(self.Edges[:,0],self.Edges[:,1],self.edgeLengths(),strength)
+
+    def angleGoals(self,strength):
+
+        """ Keep the node angles at their ideal, replicates makeAngleGoals """
+
+        return angleGoals(self.Points,self.Indptr,self.Indices,strength)
+
+    def onPlaneGoals(self,strength,origin=(0.0,0.0,0.0),normal=(0.0,0.0,1.0)):
+
+        """ Pull the nodes to a plane (default the XY plane), replicates makeOnPlaneGoals """
+
+        return hg.OnPlaneGroup(np.arange(len(self.Points)),origin,normal,strength)
@@ -0,0 +1,134 @@
+﻿"""
+Batch polyline to goal compiler for the headless solver, the vectorized
+equivalent of calling shapingBeamGoals (ShapingBeamGoals) and
+makeCableElementGoals (ShapingCableGoals) once per polyline. All polylines of
+a model are given as one (n,3) vertex array with offsets, where the vertices
+of polyline k are vertices[offsets[k]:offsets[k+1]]. Coincident vertices of
+different polylines are welded to shared particles, and the spring and angle
+goals of all polylines are made as single goal groups.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import numpy as np
+import HeadlessSolver as hs
+import HeadlessGoals as hg
+
+def raggedPolylines(polylines):
+
+    """ Convert a list of polyline vertex arrays to one vertex array and offsets """
+
+    sizes = np.array([len(pl) for pl in polylines],dtype=np.int64)
+    offsets = np.concatenate(([0],np.cumsum(sizes)))
+    if not len(polylines):
+        return np.zeros((0,3)),offsets
+    return np.concatenate([np.asarray(pl,dtype=np.float64).reshape(-1,3) for pl in polylines]),offsets
+
+class PolylineModel(object):
+
+    """ The welded particles and segments of many polylines """
+
+    def __init__(self,vertices,offsets,tolerance=0.0001):
+
+        # Weld coincident vertices to particles
+        vertices = np.asarray(vertices,dtype=np.float64).reshape(-1,3)
+        self.Offsets = np.asarray(offsets,dtype=np.int64)
+        particleIds,self.VertexParticles = np.unique(hs.mergePoints(vertices,tolerance),return_inverse=True)
+        self.VertexParticles = self.VertexParticles.ravel()
+        self.Points = vertices[particleIds]
+
+        # A segment starts at every vertex but the last of its polyline
+        sizes = np.diff(self.Offsets)
+        self.SegmentCounts = np.maximum(sizes - 1,0)
+        self.SegmentOffsets = np.concatenate(([0],np.cumsum(self.SegmentCounts)))
+        self.SegmentPolylines = np.repeat(np.arange(len(sizes)),self.SegmentCounts)
+        first = np.arange(self.SegmentOffsets[-1]) - self.SegmentOffsets[self.SegmentPolylines]
+        startVertices = self.Offsets[self.SegmentPolylines] + first
+        self.Segments = np.stack((self.VertexParticles[startVertices],self.VertexParticles[startVertices + 1]),axis=1)
+        vectors = vertices[startVertices + 1] - vertices[startVertices]
+        self.SegmentLengths = np.sqrt(np.einsum("ij,ij->i",vectors,vectors))
+        self.Lengths = np.bincount(self.SegmentPolylines,self.SegmentLengths,len(sizes))
+
+    def __len__(self):
+        return len(self.Offsets) - 1
+
+    def makeSystem(self):
+
+        """ Make a system with a particle per welded vertex """
+
+        ps = hs.PhysicalSystem()
+        ps.AddParticles(self.Points)
+        return ps
+
+    def bendPairs(self,bendAngleMin,minSegLength=0.0):
+
+        """ Get the consecutive segment pairs (a,b) that are continuous, i.e. meet at an angle above bendAngleMin + 1 degrees """
+
+        # Pair each segment with the next one of its polyline, wrapping around to the first
+        count = len(self.Segments)
+        a = np.arange(count)
+        b = a + 1
+        last = self.SegmentOffsets[1:][self.SegmentCounts > 0] - 1
+        b[last] = self.SegmentOffsets[:-1][self.SegmentCounts > 0]
+
+        # Keep pairs of long enough segments that connect (only wrapping around on closed polylines)
+        keep = (a != b) & (self.Segments[a,1] == self.Segments[b,0])
+        keep &= (self.SegmentLengths[a] > minSegLength) & (self.SegmentLengths[b] > minSegLength)
+        a,b = a[keep],b[keep]
+
+        # The angle between the segment A direction and the reversed segment B direction is 180 degrees when straight
+        p = self.Points
+        vA = p[self.Segments[a,1]] - p[self.Segments[a,0]]
+        vB = p[self.Segments[b,0]] - p[self.Segments[b,1]]
+        lengths = np.sqrt(np.einsum("ij,ij->i",vA,vA) * np.einsum("ij,ij->i",vB,vB))
+        cosAngle = np.einsum("ij,ij->i",vA,vB) / np.where(lengths > 0.0,lengths,1.0)
+        angles = np.degrees(np.arccos(np.clip(cosAngle,-1.0,1.0)))
+        continuous = angles > bendAngleMin + 1
+        return a[continuous],b[continuous]
+
+    def springGoals(self,restLengths,springStrength,keep=None):
+
+        """ Make a spring per segment (or per kept segment), with strength scaled by the segment count of its polyline """
+
+        strengths = springStrength * self.SegmentCounts[self.SegmentPolylines]
+        restLengths = np.broadcast_to(restLengths,(len(self.Segments),))
+        if keep is None:
+            keep = slice(None)
+        return hg.SpringGroup(self.Segments[keep,0],self.Segments[keep,1],restLengths[keep],strengths[keep])
+
+    def beamGoals(self,targetLengths=None,springStrength=1.0,bendStrength=1.0,bendAngleMin=0.0,minSegLength=0.0):
+
+        """ Make spring and angle goals for bending elements, replicates shapingBeamGoals """
+
+        # Scale the rest lengths so each polyline with a (non zero) target length sums to it
+        restLengths = self.SegmentLengths
+        if targetLengths is not None:
+            targetLengths = np.broadcast_to(np.asarray(targetLengths,dtype=np.float64),(len(self),))
+            factors = np.where(targetLengths != 0.0,targetLengths / np.where(self.Lengths > 0.0,self.Lengths,1.0),1.0)
+            restLengths = restLengths * factors[self.SegmentPolylines]
+        springs = self.springGoals(restLengths,springStrength,self.SegmentLengths > minSegLength)
+
+        # Straighten the continuous consecutive segments
+        a,b = self.bendPairs(bendAngleMin,minSegLength)
+        angles = hg.AngleGroup(self.Segments[a,0],self.Segments[a,1],self.Segments[b,0],self.Segments[b,1],0.0,bendStrength)
+        return [springs,angles]
+
+    def cableGoals(self,targetLengths=None,springStrength=1.0):
+
+        """ Make spring goals for cable elements, replicates makeCableElementGoals """
+
+        # A target length is divided evenly over the segments of its polyline
+        restLengths = self.SegmentLengths
+        if targetLengths is not None:
+            targetLengths = np.broadcast_to(np.asarray(targetLengths,dtype=np.float64),(len(self),))
+            restLengths = (targetLengths / np.maximum(self.SegmentCounts,1))[self.SegmentPolylines]
+        return [self.springGoals(restLengths,springStrength)]
+
+    def polylines(self,ps):
+
+        """ Return the solved vertices of every polyline as a list of (k,3) arrays """
+
+        vertices = ps.GetPositionsView()[self.VertexParticles]
+        return np.split(vertices,self.Offsets[1:-1])
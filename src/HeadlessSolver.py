@@ -0,0 +1,778 @@
+﻿"""
+Headless NumPy particle system mirroring the KangarooSolver.PhysicalSystem API
+(AssignPIndex, AddParticle, Step, SimpleStep, GetvSum, GetOutput, GetPositions,
+GetIterations). Particle positions, velocities and the goal move/weight sums
+are stored in contiguous float64 arrays, so goals from HeadlessGoals can be
+solved on machines without Rhino/Grasshopper.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+def scatterAdd(target,indices,values):
+
+    """ Add values into target at (possibly repeated) indices """
+
+    # Few indices into a large array, add them directly
+    if len(indices) * 16 < len(target):
+        np.add.at(target,indices,values)
+
+    # Many indices, sum them per axis with bincount
+    elif target.ndim == 1:
+        target += np.bincount(indices,values,minlength=len(target))
+    else:
+        for k in range(target.shape[1]):
+            target[:,k] += np.bincount(indices,values[:,k],minlength=len(target))
+
+def cellKeys(cells):
+
+    """ Map integer grid cells (n,3) to int64 keys, in row order when the grid fits in 62 bits """
+
+    # Linear keys, so nearby cells get nearby keys
+    low = cells.min(axis=0) - 1
+    dims = cells.max(axis=0) - low + 2
+    if float(dims[0]) * float(dims[1]) * float(dims[2]) < 2.0 ** 62:
+        def keys(c):
+            c = c - low
+            return (c[:,0] * dims[1] + c[:,1]) * dims[2] + c[:,2]
+        return keys
+
+    # Hashed keys for very large grids
+    def keys(c):
+        with np.errstate(over="ignore"):
+            return (c[:,0] * 73856093) ^ (c[:,1] * 19349663) ^ (c[:,2] * 83492791)
+    return keys
+
+# Offsets of the 2x2x2 cells on the near side of a point, starting with its own cell
+NEAR_OFFSETS = np.indices((2,2,2)).reshape(3,-1).T
+
+def cellPairs(keys,cells,sides,targetKeys):
+
+    """ Pair points with the target points in the 2x2x2 cells on their near side, returns (rows,targets) """
+
+    # Sort the targets by cell
+    order = np.argsort(targetKeys,kind="stable")
+    cellIds,cellStarts,cellCounts = np.unique(targetKeys[order],return_index=True,return_counts=True)
+    if not len(cellIds):
+        return np.zeros(0,dtype=np.int64),np.zeros(0,dtype=np.int64)
+    rows = []
+    targets = []
+    for offset in NEAR_OFFSETS:
+
+        # Find the neighbouring cell of each point and pair the point with every target in it
+        neighbourKeys = keys(cells + sides * offset)
+        pos = np.minimum(np.searchsorted(cellIds,neighbourKeys),len(cellIds) - 1)
+        found = np.flatnonzero(cellIds[pos] == neighbourKeys)
+        counts = cellCounts[pos[found]]
+        pairRows = np.repeat(found,counts)
+        pairStarts = np.repeat(cellStarts[pos[found]] - np.cumsum(counts) + counts,counts)
+        rows.append(pairRows)
+        targets.append(order[pairStarts + np.arange(len(pairRows))])
+    return np.concatenate(rows),np.concatenate(targets)
+
+def nearPairs(points,rows,targets,tolSq):
+
+    """ Keep the pairs of earlier targets within tolerance, returns (rows,targets,distSq) """
+
+    delta = points[targets] - points[rows]
+    distSq = np.einsum("ij,ij->i",delta,delta)
+    near = (targets < rows) & (distSq <= tolSq)
+    return rows[near],targets[near],distSq[near]
+
+def mergeSequential(points,keys,cells,sides,isRep,indices,tolSq):
+
+    """ Decide which of indices are representatives one point at a time, in index order """
+
+    # Representatives by cell
+    repCells = {}
+    reps = np.flatnonzero(isRep)
+    for r,k in zip(reps.tolist(),keys(cells[reps]).tolist()):
+        repCells.setdefault(k,[]).append(r)
+
+    # A point is a representative if no earlier representative is within tolerance
+    pts = points.tolist()
+    neighbourKeys = np.stack([keys(cells[indices] + sides[indices] * offset) for offset in NEAR_OFFSETS],axis=1).tolist()
+    for i,iKeys in zip(indices.tolist(),neighbourKeys):
+        x,y,z = pts[i]
+        merged = False
+        for k in iKeys:
+            for r in repCells.get(k,()):
+                rx,ry,rz = pts[r]
+                if r < i and (rx-x)**2 + (ry-y)**2 + (rz-z)**2 <= tolSq:
+                    merged = True
+                    break
+            if merged:
+                break
+        if not merged:
+            isRep[i] = True
+            repCells.setdefault(iKeys[0],[]).append(i)
+
+def mergePoints(points,tolerance,fixedCount=0):
+
+    """ Map each point to the nearest earlier representative point within tolerance, like adding them one at a time, using a uniform grid spatial hash """
+
+    # Bin points into grid cells twice the size of the tolerance
+    n = len(points)
+    parents = np.arange(n)
+    if not n:
+        return parents
+    scaled = points / (2.0 * tolerance)
+    cells = np.floor(scaled).astype(np.int64)
+    keys = cellKeys(cells)
+    pointKeys = keys(cells)
+
+    # Points within tolerance can only be in the 2x2x2 cells on the near side of each axis
+    sides = np.where(scaled - cells < 0.5,-1,1)
+
+    # Points in the same half tolerance cell are (nearly) all within tolerance of each other
+    fineCells = np.floor(points / (0.5 * tolerance)).astype(np.int64)
+    fineKeys = cellKeys(fineCells)(fineCells)
+
+    # The first fixedCount points are always representatives (e.g. existing particles)
+    tolSq = tolerance * tolerance
+    isRep = np.zeros(n,dtype=bool)
+    isRep[:fixedCount] = True
+    undecided = ~isRep
+    newReps = np.arange(min(fixedCount,n))
+    while undecided.any():
+
+        # Points within tolerance of an earlier representative are merged, only comparing against representatives
+        u = np.flatnonzero(undecided)
+        if len(newReps):
+            rows,targets = cellPairs(keys,cells[u],sides[u],pointKeys[newReps])
+            rows,targets,distSq = nearPairs(points,u[rows],newReps[targets],tolSq)
+            undecided[rows] = False
+        u = np.flatnonzero(undecided)
+        if not len(u):
+            break
+
+        # Only the first undecided point of a fine cell can become a representative, if no earlier undecided point is within tolerance
+        order = np.argsort(fineKeys[u],kind="stable")
+        starts = np.flatnonzero(np.concatenate(([True],fineKeys[u][order][1:] != fineKeys[u][order][:-1])))
+        leaders = np.minimum.reduceat(u[order],starts)
+        rows,targets = cellPairs(keys,cells[leaders],sides[leaders],pointKeys[u])
+        rows,targets,distSq = nearPairs(points,leaders[rows],u[targets],tolSq)
+        newReps = np.setdiff1d(leaders,rows)
+        isRep[newReps] = True
+        undecided[newReps] = False
+
+        # Finish one point at a time when few points are decided per pass, e.g. for chains of points
+        if len(u) - np.count_nonzero(undecided) < 0.1 * len(u):
+            mergeSequential(points,keys,cells,sides,isRep,np.flatnonzero(undecided),tolSq)
+            break
+
+    # Point the merged points to their nearest earlier representative, ties going to the lowest index
+    merged = np.flatnonzero(~isRep)
+    reps = np.flatnonzero(isRep)
+    rows,targets = cellPairs(keys,cells[merged],sides[merged],pointKeys[reps])
+    rows,targets,distSq = nearPairs(points,merged[rows],reps[targets],tolSq)
+    order = np.lexsort((targets,distSq,rows))
+    rows,targets = rows[order],targets[order]
+    first = np.ones(len(rows),dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    parents[rows[first]] = targets[first]
+    return parents
+
+def sumGoals(goals,p,moveSum,weightSum):
+
+    """ Calculate goals and add their weighted moves and weightings into the accumulators """
+
+    for g in goals:
+        g.Calculate(p)
+        scatterAdd(moveSum,g.PIndex,g.Move * g.Weighting[:,None])
+        scatterAdd(weightSum,g.PIndex,g.Weighting)
+
+def partitionGoals(goals,parts,minCount=10000):
+
+    """ Split goals into (goal,start,stop) ranges, large goal groups into up to parts ranges of at least minCount goals """
+
+    ranges = []
+    for g in goals:
+        count = getattr(g,"Count",1)
+        splits = min(parts,count // minCount) if hasattr(g,"take") else 1
+        if splits > 1:
+            bounds = np.linspace(0,count,splits + 1).astype(int)
+            ranges.extend((g,a,b) for a,b in zip(bounds[:-1],bounds[1:]))
+        else:
+            ranges.append((g,None,None))
+    return ranges
+
+def balanceGoals(ranges,parts):
+
+    """ Split goal ranges into parts with about the same number of goal particles, largest ranges first """
+
+    def size(r):
+        g,start,stop = r
+        if start is None:
+            return len(g.PIndex)
+        return len(g.PIndex) // g.Count * (stop - start)
+    buckets = [[] for i in range(parts)]
+    sizes = [0] * parts
+    for r in sorted(ranges,key=size,reverse=True):
+        i = sizes.index(min(sizes))
+        buckets[i].append(r)
+        sizes[i] += size(r)
+    return [b for b in buckets if b]
+
+def sumGoalRanges(ranges,p,moveSum,weightSum):
+
+    """ Calculate goal ranges and add their weighted moves and weightings into the accumulators """
+
+    for g,start,stop in ranges:
+        if start is None:
+            sumGoals([g],p,moveSum,weightSum)
+            continue
+
+        # Calculate a copy of the range and write its moves and weightings back into the group, slot by slot
+        part = g.take(start,stop)
+        sumGoals([part],p,moveSum,weightSum)
+        slots = len(g.Move) // g.Count
+        g.Move.reshape(slots,g.Count,3)[:,start:stop] = part.Move.reshape(slots,-1,3)
+        g.Weighting.reshape(slots,g.Count)[:,start:stop] = part.Weighting.reshape(slots,-1)
+
+def colourGraph(edges,count,seed=0):
+
+    """ Colour count nodes so no edge joins two nodes of the same colour, returns a colour per node """
+
+    edges = np.asarray(edges,dtype=np.int64).reshape(-1,2)
+    edges = edges[edges[:,0] != edges[:,1]]
+    colours = np.full(count,-1,dtype=np.int64)
+    priorities = np.random.default_rng(seed).permutation(count)
+    colour = 0
+    while np.any(colours < 0):
+
+        # Grow a maximal independent set, nodes win over their candidate neighbours by lowest priority
+        candidates = colours < 0
+        while np.any(candidates):
+            a,b = edges[candidates[edges[:,0]] & candidates[edges[:,1]]].T
+            lowest = priorities.copy()
+            np.minimum.at(lowest,a,priorities[b])
+            np.minimum.at(lowest,b,priorities[a])
+            won = candidates & (lowest == priorities)
+            colours[won] = colour
+            candidates &= ~won
+            candidates[b[won[a]]] = False
+            candidates[a[won[b]]] = False
+        colour += 1
+    return colours
+
+def goalEdges(goals):
+
+    """ Make the edges between all particles that share a goal, returns a (k,2) array """
+
+    edges = [np.zeros((0,2),dtype=np.int64)]
+    for g in goals:
+        slots = g.PIndex.reshape(-1,getattr(g,"Count",1))
+        for s in range(len(slots)):
+            for t in range(s + 1,len(slots)):
+                edges.append(np.stack((slots[s],slots[t]),axis=1))
+    return np.concatenate(edges)
+
+def colourGoals(goals,particleCount):
+
+    """ Colour the particles and batch the goals acting on each colour, for Gauss-Seidel steps """
+
+    # Particles of a colour share no goals, so they can all be moved at once
+    colours = colourGraph(goalEdges(goals),particleCount)
+    batches = []
+    for c in range(colours.max() + 1 if particleCount else 0):
+        inColour = colours == c
+        batchGoals = []
+        for g in goals:
+
+            # Select the goals of groups which act on particles of this colour
+            touching = np.any(inColour[g.PIndex.reshape(-1,getattr(g,"Count",1))],axis=0)
+            if hasattr(g,"select"):
+                if np.any(touching):
+                    batchGoals.append(g.select(np.flatnonzero(touching)))
+            elif np.any(touching):
+                batchGoals.append(g)
+        batches.append((np.flatnonzero(inColour),batchGoals))
+    return batches
+
+class PhysicalSystem(object):
+
+    """ Particle system that solves headless goals by projection """
+
+    def __init__(self,damping=0.9):
+
+        # Particle arrays, allocated with spare capacity
+        self._count = 0
+        self._positions = np.zeros((0,3))
+        self._velocities = np.zeros((0,3))
+        self._moveSum = np.zeros((0,3))
+        self._weightSum = np.zeros(0)
+
+        # Solver state
+        self.Damping = damping
+        self._vSum = 0.0
+        self._iterations = 0
+
+        # Over-relaxation of Gauss-Seidel steps, goals such as springs only move each particle part of the way
+        self.Relaxation = 1.5
+
+        # Threads for parallel steps, each with its own accumulators, and the smallest goal group range per thread
+        self.Threads = os.cpu_count() or 1
+        self.MinPartition = 10000
+        self._pool = None
+        self._poolThreads = 0
+        self._threadSums = []
+
+    def _reserve(self,count):
+
+        """ Grow the particle arrays to hold at least count particles """
+
+        capacity = len(self._positions)
+        if count <= capacity:
+            return
+        capacity = max(count,2 * capacity,64)
+        for name in ("_positions","_velocities","_moveSum"):
+            grown = np.zeros((capacity,3))
+            grown[:self._count] = getattr(self,name)[:self._count]
+            setattr(self,name,grown)
+        grown = np.zeros(capacity)
+        grown[:self._count] = self._weightSum[:self._count]
+        self._weightSum = grown
+
+    def AddParticle(self,point,mass=1.0):
+
+        """ Add a particle at point and return its index """
+
+        # mass is accepted for K2 signature compatibility only
+        self._reserve(self._count + 1)
+        self._positions[self._count] = point
+        self._velocities[self._count] = 0.0
+        self._count += 1
+        return self._count - 1
+
+    def AddParticles(self,points):
+
+        """ Add a particle at each point (n,3) and return their indices """
+
+        points = np.asarray(points,dtype=np.float64).reshape(-1,3)
+        start = self._count
+        self._reserve(start + len(points))
+        self._positions[start:start + len(points)] = points
+        self._velocities[start:start + len(points)] = 0.0
+        self._count += len(points)
+        return np.arange(start,self._count)
+
+    def FindParticleIndex(self,point,tolerance):
+
+        """ Return the index of the particle closest to point within tolerance, or -1 """
+
+        if not self._count:
+            return -1
+        delta = self._positions[:self._count] - point
+        distSq = np.einsum("ij,ij->i",delta,delta)
+        i = int(np.argmin(distSq))
+        if distSq[i] <= tolerance * tolerance:
+            return i
+        return -1
+
+    def AssignPIndex(self,goal,tolerance,byName=False):
+
+        """ Set goal.PIndex, combining points closer than tolerance into one particle """
+
+        # byName is accepted for K2 signature compatibility only, goals given by particle indices keep them
+        if goal.PPos is None:
+            return
+        pIndex = np.empty(len(goal.PPos),dtype=np.int64)
+        for i,pt in enumerate(goal.PPos):
+            j = self.FindParticleIndex(pt,tolerance)
+            if j < 0:
+                j = self.AddParticle(pt)
+            pIndex[i] = j
+        goal.PIndex = pIndex
+
+    def AssignPIndices(self,goals,tolerance):
+
+        """ Set PIndex of all goals at once, combining points closer than tolerance using a spatial hash """
+
+        # Gather the existing particles and all goal points
+        goals = [g for g in goals if g.PPos is not None]
+        if not goals:
+            return
+        n = self._count
+        pts = np.concatenate([self._positions[:n]] + [g.PPos for g in goals])
+        parents = mergePoints(pts,tolerance,n)
+
+        # Make particles from the goal points that were not merged
+        newReps = np.flatnonzero(parents[n:] == np.arange(n,len(pts))) + n
+        ids = np.arange(len(pts))
+        ids[newReps] = n + np.arange(len(newReps))
+        self._reserve(n + len(newReps))
+        self._positions[n:n + len(newReps)] = pts[newReps]
+        self._velocities[n:n + len(newReps)] = 0.0
+        self._count = n + len(newReps)
+
+        # Slice the particle indices back into the goals
+        pIndex = ids[parents[n:]]
+        start = 0
+        for g in goals:
+            g.PIndex = pIndex[start:start + len(g.PPos)]
+            start += len(g.PPos)
+
+    def ClearParticles(self):
+
+        """ Remove all particles and reset the solver state """
+
+        self._count = 0
+        self._vSum = 0.0
+        self._iterations = 0
+
+    def ParticleCount(self):
+        return self._count
+
+    def SetPositions(self,positions):
+
+        """ Overwrite the particle positions and zero their velocities """
+
+        self._positions[:self._count] = positions
+        self._velocities[:self._count] = 0.0
+
+    def Step(self,goals,parallel,threshold):
+
+        """ Calculate all goals and move the particles one iteration """
+
+        n = self._count
+        p = self._positions[:n]
+        moveSum = self._moveSum[:n]
+        weightSum = self._weightSum[:n]
+        moveSum[:] = 0.0
+        weightSum[:] = 0.0
+
+        # Calculate goals and sum their weighted moves per particle
+        if parallel and self.Threads > 1:
+            self._sumGoalsParallel(goals,p,moveSum,weightSum)
+        else:
+            sumGoals(goals,p,moveSum,weightSum)
+
+        # Average the moves of each particle
+        move = np.zeros((n,3))
+        active = weightSum > 0.0
+        move[active] = moveSum[active] / weightSum[active,None]
+
+        # Move the particles
+        p += self._momentum(move,threshold)
+
+    def GaussSeidelStep(self,batches,threshold):
+
+        """ Move the particles one colour at a time, so each colour sees the moves of the previous ones """
+
+        n = self._count
+        p = self._positions[:n]
+        moveSum = self._moveSum[:n]
+        weightSum = self._weightSum[:n]
+        start = p.copy()
+
+        # Average the moves of the goals acting on each colour and move its particles
+        for particles,goals in batches:
+            moveSum[:] = 0.0
+            weightSum[:] = 0.0
+            sumGoals(goals,p,moveSum,weightSum)
+            particles = particles[weightSum[particles] > 0.0]
+            p[particles] += self.Relaxation * moveSum[particles] / weightSum[particles,None]
+        move = p - start
+
+        # Move the particles
+        p[:] = start + self._momentum(move,threshold)
+
+    def _momentum(self,move,threshold):
+
+        """ Add the moves of an iteration to the damped velocities, returns the velocities to move the particles by """
+
+        # Apply momentum until the system drops below the threshold
+        v = self._velocities[:self._count]
+        if self._vSum > threshold:
+            v *= self.Damping
+            v[np.einsum("ij,ij->i",v,move) < 0.0] = 0.0
+        else:
+            v[:] = 0.0
+        v += move
+        self._vSum = float(np.einsum("ij,ij->",v,v))
+        self._iterations += 1
+        return v
+
+    def _sumGoalsParallel(self,goals,p,moveSum,weightSum):
+
+        """ Calculate balanced buckets of goal ranges on a thread pool and reduce the per thread accumulators """
+
+        # Split large goal groups over the threads and make the thread pool and the per thread accumulators
+        n = len(p)
+        buckets = balanceGoals(partitionGoals(goals,self.Threads,self.MinPartition),self.Threads)
+        if self._pool is None or self._poolThreads != self.Threads:
+            if self._pool is not None:
+                self._pool.shutdown()
+            self._pool = ThreadPoolExecutor(self.Threads)
+            self._poolThreads = self.Threads
+        if len(self._threadSums) != self.Threads or len(self._threadSums[0][1]) != n:
+            self._threadSums = [(np.zeros((n,3)),np.zeros(n)) for i in range(self.Threads)]
+
+        # Goals only read the positions and the ranges write disjoint moves, so each bucket can be calculated independently
+        def sumBucket(bucket,sums):
+            sums[0][:] = 0.0
+            sums[1][:] = 0.0
+            sumGoalRanges(bucket,p,sums[0],sums[1])
+        futures = [self._pool.submit(sumBucket,b,s) for b,s in zip(buckets,self._threadSums)]
+        for f in futures:
+            f.result()
+
+        # Reduce the accumulators
+        for m,w in self._threadSums[:len(buckets)]:
+            moveSum += m
+            weightSum += w
+
+    def SimpleStep(self,goals):
+
+        """ Step the system using the default settings """
+
+        self.Step(goals,True,1e-15)
+
+    def GetvSum(self):
+        return self._vSum
+
+    def GetIterations(self):
+        return self._iterations
+
+    def GetPositions(self):
+        return self._positions[:self._count].copy()
+
+    def GetPositionsView(self):
+
+        """ Get a read-only view of the particle positions, which is stale once particles are added """
+
+        view = self._positions[:self._count].view()
+        view.flags.writeable = False
+        return view
+
+    def GetState(self):
+
+        """ Get the particle and solver state as a dict of arrays, e.g. for checkpoints """
+
+        n = self._count
+        return {"positions":self._positions[:n].copy(),
+                "velocities":self._velocities[:n].copy(),
+                "vSum":np.float64(self._vSum),
+                "iterations":np.int64(self._iterations),
+                "damping":np.float64(self.Damping)}
+
+    def SetState(self,state):
+
+        """ Replace the particles and solver state with a state from GetState """
+
+        self._count = 0
+        self.AddParticles(state["positions"])
+        self._velocities[:self._count] = state["velocities"]
+        self._vSum = float(state["vSum"])
+        self._iterations = int(state["iterations"])
+        self.Damping = float(state["damping"])
+
+    def GetLazyOutput(self,goals):
+
+        """ Return a LazyOutput for every goal that has an output """
+
+        outputs = []
+        for g in goals:
+            indices = g.OutputIndices()
+            if indices is not None:
+                outputs.append(LazyOutput(self,indices))
+        return outputs
+
+    def __getstate__(self):
+
+        # Thread pools can not be pickled, a new one is made on the next parallel step
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        state["_poolThreads"] = 0
+        state["_threadSums"] = []
+        return state
+
+    def GetOutput(self,goals):
+
+        """ Return the output of every goal that has one """
+
+        p = self._positions[:self._count]
+        outputs = []
+        for g in goals:
+            o = g.Output(p)
+            if o is not None:
+                outputs.append(o)
+        return outputs
+
+class LazyOutput(object):
+
+    """ Goal output that is only made from the current particle positions when it is read """
+
+    __slots__ = ("System","Indices")
+
+    def __init__(self,ps,indices):
+
+        self.System = ps
+        self.Indices = indices
+
+    @property
+    def shape(self):
+        return self.Indices.shape + (3,)
+
+    def __len__(self):
+        return len(self.Indices)
+
+    def __getitem__(self,i):
+        return self.System.GetPositionsView()[self.Indices[i]]
+
+    def __array__(self,dtype=None,copy=None):
+        output = self.System.GetPositionsView()[self.Indices]
+        return output if dtype is None else output.astype(dtype)
+
+def indexGoals(goals,tolerance,ps=None,positions=None):
+
+    """ Get a system (new or ps) with particles for goals, (re)indexing every goal given by points like ZombieSolver """
+
+    # Goals given by particle indices index the particles of ps and/or positions
+    if ps is None:
+        ps = PhysicalSystem()
+    if positions is not None:
+        ps.AddParticles(np.asarray(positions,dtype=np.float64).reshape(-1,3))
+    ps.AssignPIndices(goals,tolerance)
+    for g in goals:
+        if g.PPos is None and len(g.PIndex) and g.PIndex.max() >= ps.ParticleCount():
+            raise IndexError("Goal particle indices exceed the %d particles of the system, pass the system or particle positions" % ps.ParticleCount())
+    return ps
+
+def zombieSolve(goals,tolerance=0.0001,threshold=1e-13,maxIterations=5000,gaussSeidel=False,recorder=None,ps=None,positions=None):
+
+    """ Solve goals ala the ZombieSolver component, returns system and iterations """
+
+    # Make (or extend) solver system and assign particle indices
+    ps = indexGoals(goals,tolerance,ps,positions)
+    if gaussSeidel:
+        batches = colourGoals(goals,ps.ParticleCount())
+
+    # Solve zombie style i.e. max N iterations, break when average movement drops below threshold
+    i = 0
+    while i < maxIterations:
+        if gaussSeidel:
+            ps.GaussSeidelStep(batches,threshold)
+        else:
+            ps.Step(goals,False,threshold)
+        i += 1
+        if recorder is not None:
+            recorder.record(ps)
+        if ps.GetvSum() < threshold:
+            break
+
+    return ps,i
+
+class SolveTrace(object):
+
+    """ Iteration history of a solve, returned by adaptiveSolve """
+
+    def __init__(self):
+
+        self.iterations = 0
+        self.vSums = []
+        self.dampings = []
+        self.maxMoves = []
+        self.residuals = []
+        self.reason = None
+        self.converged = False
+
+def adaptiveSolve(ps,goals,maxIterations=5000,threshold=1e-13,moveTolerance=0.0001,plateauTolerance=1e-4,
+                  blockSize=10,maxBlockSize=200,minDamping=0.5,maxDamping=0.98,peakBlocks=3,peakDrop=1e-6):
+
+    """ Solve in blocks of iterations, adapting the damping and stopping on convergence, tolerance or plateaus.
+    Tolerance and plateau stops only count as converged once the velocity sum has dropped by peakDrop from its peak.
+    The damping of the system is restored when the solve returns """
+
+    trace = SolveTrace()
+    block = blockSize
+    damping = ps.Damping
+    previous = ps.GetPositions()
+    previousMean = None
+    previousSteps = 0
+    peakVSum = 0.0
+    started = False
+    falls = 0
+    plateaus = 0
+    while trace.iterations < maxIterations:
+
+        # Step a block of iterations, counting velocity sum increases
+        steps = min(block,maxIterations - trace.iterations)
+        rises = 0
+        for i in range(steps):
+            ps.Step(goals,False,threshold)
+            vSum = ps.GetvSum()
+            if trace.vSums and vSum > trace.vSums[-1]:
+                rises += 1
+            trace.vSums.append(vSum)
+            trace.dampings.append(ps.Damping)
+            trace.iterations += 1
+            if vSum < threshold:
+                ps.Damping = damping
+                trace.reason = "threshold"
+                trace.converged = True
+                return trace
+        peakVSum = max(peakVSum,max(trace.vSums[-steps:]))
+        dropped = vSum < peakDrop * peakVSum
+
+        # Largest particle move over the block
+        positions = ps.GetPositions()
+        delta = positions - previous
+        maxMove = float(np.sqrt(np.einsum("ij,ij->i",delta,delta).max())) if len(delta) else 0.0
+        trace.maxMoves.append(maxMove)
+        previous = positions
+
+        # The velocity sum rises at the start of a solve, adapt once it starts falling and only stop once it has peaked,
+        # i.e. the block means have fallen over several consecutive blocks
+        mean = float(np.mean(trace.vSums[-steps:]))
+        rising = previousMean is not None and mean > previousMean
+        falling = previousMean is not None and mean < previousMean
+        falls = falls + 1 if falling else 0
+        peaked = falls >= peakBlocks
+        started = started or falling
+
+        # Stop when the particles will move less than the tolerance from here, summing the moves of the coming
+        # blocks as a geometric series at the rate the block means decayed
+        if peaked and falling and dropped and mean > 0.0:
+            rate = np.sqrt(mean / previousMean) ** (2.0 * steps / (steps + previousSteps))
+            if maxMove * rate / (1.0 - rate) < moveTolerance:
+                ps.Damping = damping
+                trace.reason = "tolerance"
+                trace.converged = True
+                return trace
+
+        # Stop when the mean velocity sum has plateaued over several blocks
+        if previousMean and abs(mean - previousMean) < plateauTolerance * previousMean:
+            plateaus += 1
+        else:
+            plateaus = 0
+        if plateaus >= peakBlocks:
+            ps.Damping = damping
+            trace.reason = "plateau"
+            trace.converged = dropped
+            return trace
+
+        # Oscillating, damp the momentum and watch closely
+        if started and rising and rises * 2 > steps:
+            ps.Damping = max(minDamping,ps.Damping * 0.9)
+            block = blockSize
+
+        # Decreasing, restore the damping once falling steadily, or add momentum if stagnating, and check less often
+        elif started and falling:
+            if ps.Damping < damping and rises * 4 < steps:
+                ps.Damping = min(damping,ps.Damping + 0.5 * (damping - ps.Damping) + 0.01)
+            elif mean > 0.9 * previousMean:
+                ps.Damping = min(maxDamping,ps.Damping + 0.5 * (maxDamping - ps.Damping))
+            block = min(maxBlockSize,block * 2)
+        previousMean = mean
+        previousSteps = steps
+
+    ps.Damping = damping
+    trace.reason = "maxIterations"
+    return trace
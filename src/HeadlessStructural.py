@@ -0,0 +1,154 @@
+﻿"""
+K2Engineering style structural goals for the headless solver (Bar, Cable, Rod
+and Support), built on the goal groups in HeadlessGoals. The weightings are
+calibrated from the section and material properties, so that the weighted goal
+moves equal the member forces (e.g. E*A/L times the elongation for bars).
+Self-weight loads are made with Selfweight and HeadlessGoals.LoadGroup.
+MemberModel compiles the goals of all the beam and cable member polylines of a
+model at once, like CalibratedBeamGoals and CalibratedCableGoals per polyline.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import math
+import numpy as np
+import HeadlessGoals as hg
+import HeadlessPolylines as hp
+import Selfweight as sw
+
+def segmentLengths(starts,ends):
+
+    """ Calculate the lengths of segments given as start/end point arrays """
+
+    edges = np.asarray(ends,dtype=np.float64).reshape(-1,3) - np.asarray(starts,dtype=np.float64).reshape(-1,3)
+    return np.sqrt(np.einsum("ij,ij->i",edges,edges))
+
+class BarGroup(hg.SpringGroup):
+
+    """ Many axial bars, replicates k2e.Bar.BarGoal """
+
+    def __init__(self,starts,ends,youngsModulus,area,restLengths=None):
+
+        # Rest lengths default to the initial segment lengths
+        if restLengths is None:
+            restLengths = segmentLengths(starts,ends)
+        restLengths = np.asarray(restLengths,dtype=np.float64)
+
+        # A spring move is half the elongation, so weight by twice the axial stiffness
+        axialStiffness = np.asarray(youngsModulus) * np.asarray(area) / restLengths
+        hg.SpringGroup.__init__(self,starts,ends,restLengths,2.0 * axialStiffness)
+        self.YoungsModulus = youngsModulus
+        self.Area = area
+
+class CableGroup(BarGroup):
+
+    """ Many tension only cables with prestress, replicates k2e.Cable.CableGoal """
+
+    def __init__(self,starts,ends,youngsModulus,area,prestress=0.0,restLengths=None):
+
+        # Shorten the rest lengths by the elongation caused by the prestress force
+        if restLengths is None:
+            restLengths = segmentLengths(starts,ends)
+        restLengths = np.asarray(restLengths,dtype=np.float64)
+        ea = np.asarray(youngsModulus) * np.asarray(area)
+        restLengths = restLengths - np.asarray(prestress) * restLengths / ea
+        BarGroup.__init__(self,starts,ends,youngsModulus,area,restLengths)
+        self.Prestress = prestress
+
+    def Calculate(self,p):
+
+        # Slack cables do not push
+        hg.SpringGroup.Calculate(self,p)
+        current = p[self.column(1)] - p[self.column(0)]
+        slack = np.einsum("ij,ij->i",current,current) < self.RestLength * self.RestLength
+        self.Move[:self.Count][slack] = 0.0
+        self.Move[self.Count:][slack] = 0.0
+
+class RodGroup(hg.AngleGroup):
+
+    """ Many bending rods between consecutive segments, replicates k2e.Rod.RodGoal. E*I must be in the force and
+    length units of the segments (e.g. N*m2 for metres), so that the weightings match those of BarGroup """
+
+    def __init__(self,aStarts,aEnds,bStarts,bEnds,youngsModulus,inertia,restAngles=0.0,meanLengths=None):
+
+        # Mean segment lengths default to those of the initial segment pairs
+        if meanLengths is None:
+            meanLengths = 0.5 * (segmentLengths(aStarts,aEnds) + segmentLengths(bStarts,bEnds))
+        meanLengths = np.asarray(meanLengths,dtype=np.float64)
+
+        # The angle moves are about a quarter segment length per radian, so weight by 4EI/L^3
+        bendingStiffness = 4.0 * np.asarray(youngsModulus) * np.asarray(inertia) / meanLengths ** 3
+        hg.AngleGroup.__init__(self,aStarts,aEnds,bStarts,bEnds,restAngles,bendingStiffness)
+        self.YoungsModulus = youngsModulus
+        self.Inertia = inertia
+
+class SupportGroup(hg.AnchorGroup):
+
+    """ Many supports locked in the X/Y/Z axes, replicates k2e.Support.SupportGoal """
+
+    def __init__(self,points,targets,x,y,z,strengths=None):
+
+        # Support both SupportGroup(points,x,y,z,strengths) and SupportGroup(indices,targets,x,y,z,strengths)
+        if strengths is None:
+            targets,x,y,z,strengths = points,targets,x,y,z
+        hg.AnchorGroup.__init__(self,points,targets,strengths)
+        self.Locked = np.array([x,y,z],dtype=np.float64)
+
+    def Calculate(self,p):
+        hg.AnchorGroup.Calculate(self,p)
+        self.Move *= self.Locked
+
+def sectionProperties(diameters):
+
+    """ Calculate the area, moment of inertia and extreme fibre distance of solid circular sections """
+
+    diameters = np.asarray(diameters,dtype=np.float64)
+    return math.pi * (diameters / 2.0) ** 2,math.pi * diameters ** 4 / 64.0,diameters / 2.0
+
+class MemberModel(hp.PolylineModel):
+
+    """ The welded nodes and segments of the beam and cable member polylines of a model """
+
+    def memberTable(self,values):
+
+        """ Broadcast a per member value (or one value for all members) to a per member array """
+
+        return np.broadcast_to(np.asarray(values,dtype=np.float64),(len(self),))
+
+    def calibratedGoals(self,cables,diameters,youngsModuli,densities,prestresses=0.0,bendAngleMin=0.0,minSegLength=0.0):
+
+        """ Make bar, cable, rod and self-weight load goals for all members, replicates calibratedBeamGoals/calibratedCableGoals """
+
+        # Per member section and material tables, cables is a per member bool
+        cables = np.broadcast_to(np.asarray(cables,dtype=bool),(len(self),))
+        area,inertia = sectionProperties(self.memberTable(diameters))[:2]
+        youngsModuli = self.memberTable(youngsModuli)
+        densities = self.memberTable(densities)
+        prestresses = self.memberTable(prestresses) / 1000.0
+
+        # The member of each segment, and the segment end particles, all goals are index based like beamGoals
+        members = self.SegmentPolylines
+        lengths = self.SegmentLengths
+        starts,ends = self.Segments[:,0],self.Segments[:,1]
+
+        # Bars on the long enough segments of beams, cables on all segments of cables
+        bar = ~cables[members] & (lengths > minSegLength)
+        m = members[bar]
+        bars = BarGroup(starts[bar],ends[bar],youngsModuli[m] * 0.01,area[m],lengths[bar])
+        cable = cables[members]
+        m = members[cable]
+        cableGoals = CableGroup(starts[cable],ends[cable],youngsModuli[m] * 0.01,area[m],prestresses[m],lengths[cable])
+
+        # Rods between the continuous consecutive segments of beams, E scaled like the bars and I converted from mm4 to m4
+        a,b = self.bendPairs(bendAngleMin,minSegLength)
+        beam = ~cables[members[a]]
+        a,b = a[beam],b[beam]
+        m = members[a]
+        rods = RodGroup(starts[a],ends[a],starts[b],ends[b],youngsModuli[m] * 0.01,inertia[m] * 1e-6,meanLengths=0.5 * (lengths[a] + lengths[b]))
+
+        # Sum the self-weight of all segments into their shared nodes
+        loads = sw.sumNodalSelfweight(len(self.Points),self.Segments,lengths,area[members],densities[members])
+        loadGoals = hg.LoadGroup(np.arange(len(self.Points)),loads)
+        return [bars,cableGoals,rods,loadGoals]
@@ -0,0 +1,114 @@
+﻿"""
+Record the trajectory of a headless solve to memory-mapped .npy files, and read
+it back lazily. The recorder preallocates the files for maxSteps iterations on
+its first record call and writes the particle positions every N iterations
+(and vSum every iteration) straight into the mapped files, so long solves of
+large models can be recorded and inspected without holding the frames in RAM.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import os
+import numpy as np
+
+def trajectoryFiles(path):
+
+    """ Get the paths of the position, iteration and vSum files of a trajectory folder """
+
+    return [os.path.join(path,name) for name in ("positions.npy","iterations.npy","vsums.npy")]
+
+class TrajectoryRecorder(object):
+
+    """ Write particle positions every N iterations and vSum every iteration to a trajectory folder """
+
+    def __init__(self,path,maxSteps,every=1,dtype=np.float32):
+
+        self.path = path
+        self.maxSteps = maxSteps
+        self.every = every
+        self.dtype = dtype
+        self.steps = 0
+        self.frames = 0
+        self._positions = None
+
+    def _allocate(self,particleCount):
+
+        """ Preallocate the mapped files, unwritten frames have iteration -1 and unwritten steps vSum NaN """
+
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        positionsFile,iterationsFile,vSumsFile = trajectoryFiles(self.path)
+        frameCount = -(-self.maxSteps // self.every)
+        self._positions = np.lib.format.open_memmap(positionsFile,"w+",self.dtype,(frameCount,particleCount,3))
+        self._iterations = np.lib.format.open_memmap(iterationsFile,"w+",np.int64,(frameCount,))
+        self._vSums = np.lib.format.open_memmap(vSumsFile,"w+",np.float64,(self.maxSteps,))
+        self._iterations[:] = -1
+        self._vSums[:] = np.nan
+
+    def record(self,ps):
+
+        """ Record the state of a system, call once after each step """
+
+        if self._positions is None:
+            self._allocate(ps.ParticleCount())
+        if self.steps >= self.maxSteps:
+            raise ValueError("Trajectory is full, record at most %d steps" % self.maxSteps)
+
+        # Write vSum every step and the positions every N steps
+        self._vSums[self.steps] = ps.GetvSum()
+        self.steps += 1
+        if self.steps % self.every == 0:
+            self._positions[self.frames] = ps.GetPositionsView()
+            self._iterations[self.frames] = ps.GetIterations()
+            self.frames += 1
+
+    def flush(self):
+        if self._positions is not None:
+            for mapped in (self._positions,self._iterations,self._vSums):
+                mapped.flush()
+
+    def close(self):
+
+        """ Flush and unmap the files """
+
+        self.flush()
+        self._positions = self._iterations = self._vSums = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc):
+        self.close()
+
+class TrajectoryReader(object):
+
+    """ Lazily read the frames of a recorded trajectory, indexing reads frames from disk on demand """
+
+    def __init__(self,path):
+
+        # Map the files read only and trim them to the recorded frames and steps
+        positionsFile,iterationsFile,vSumsFile = trajectoryFiles(path)
+        iterations = np.load(iterationsFile,mmap_mode="r")
+        vSums = np.load(vSumsFile,mmap_mode="r")
+        frameCount = int(np.count_nonzero(iterations >= 0))
+        self.positions = np.load(positionsFile,mmap_mode="r")[:frameCount]
+        self.iterations = iterations[:frameCount]
+        self.vSums = vSums[:int(np.count_nonzero(~np.isnan(vSums)))]
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self,i):
+        return self.positions[i]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.positions[i]
+
+    def particle(self,index):
+
+        """ Get the positions of one particle (or an array of particles) in every frame """
+
+        return self.positions[:,index]
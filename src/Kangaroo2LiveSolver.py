@@ -5,9 +5,10 @@ Live Kangaroo2 solver implemented in IronPython.
         SubSteps: How many times to call the solve step per Grasshopper iteration {item,int}
         Pause: Pause the solve loop {item,bool}
         Run: Switch the solver between run and reset state {item,bool}
+        FrameRate: Keep stepping each iteration for 1/FrameRate seconds (at most 0.05) while not paused {item,float}
     Outputs:
         SystemData: Data about the physical system (particle count, goal count, velocity sum, iterations) {list,object} 
-        GoalsOutput: The output from the solved goals {list,object}
+        GoalsOutput: The output from the solved goals, published every iteration {list,object}
     Remarks:
         Authors: Anders Holden Deleuran
         License: Apache License 2.0
@@ -22,11 +23,16 @@ import Grasshopper as gh
 clr.AddReferenceToFileAndPath(gh.Folders.PluginFolder+"Components\KangarooSolver.dll")
 import KangarooSolver as ks
 from System.Collections.Generic import List
+import time
+import TopologyCache as tc
 
 # Set global solver variables
 tolerance = 0.001
 threshold = 1e-13
 
+# Longest time to keep stepping per iteration, as the solve runs on the UI thread
+maxFrameTime = 0.05
+
 def updateComponent():
     
     """ Updates this component, similar to using a grasshopper timer """
@@ -63,27 +69,68 @@ def resetSystem(ps,goals,goalList,tolerance):
     goalList.Clear()
     
     # Add goals to system and goals list
-    for g in flattenGoals(goals):
+    flatGoals = flattenGoals(goals)
+    for g in flatGoals:
         ps.AssignPIndex(g,tolerance)
         goalList.Add(g)
+        
+    return flatGoals
+
+def diffGoals(previousGoals,goals):
+    
+    """ Compare goals to the previous goals by identity, returns the added goals and whether to rebuild the goals list """
+    
+    # Unchanged or appended goals keep the goals list
+    n = len(previousGoals)
+    if len(goals) >= n and all(a is b for a,b in zip(goals,previousGoals)):
+        return goals[n:],False
+        
+    # Otherwise goals have been removed or reordered
+    previousIds = set(id(g) for g in previousGoals)
+    added = [g for g in goals if id(g) not in previousIds]
+    return added,True
+
+def warmStartSystem(ps,goals,previousGoals,cache,tolerance):
+    
+    """ Get the system of a cached goal topology when the goals have been remade, or None """
+    
+    # Cache the current system under the topology of its goals, copying the indices as reassigning a goal may overwrite them
+    if previousGoals:
+        key = tc.goalFingerprint(previousGoals,tolerance)
+        cache.put(key,(ps,[g.PIndex.Clone() for g in previousGoals]))
+        
+    # Reuse the system and particle indices of the new goals topology (e.g. when only a parameter changed)
+    return tc.warmStart(cache,goals,tolerance)
 
-def solveSystem(ps,goals,goalList,tolerance,threshold,substeps):
+def solveSystem(ps,goals,added,rebuild,goalList,tolerance,threshold,substeps,frameTime):
     
     """ Solve the goals af a K2 physical system """
     
-    # Read the goals again in case they have changed
-    goalList.Clear()
-    for g in flattenGoals(goals):
+    # Assign particles to the added goals only
+    for g in added:
         if g.PIndex == None:
             ps.AssignPIndex(g,tolerance,False)
-        goalList.Add(g)
-        
-    # Step the system N times each grasshopper iteration
-    for i in range(substeps):
-        ps.SimpleStep(goalList)
-        
-    # Get the velocity sum and set converged tag
-    vSum = ps.GetvSum()
+            
+    # Update the goals list with what changed
+    if rebuild:
+        goalList.Clear()
+        for g in goals:
+            goalList.Add(g)
+    else:
+        for g in added:
+            goalList.Add(g)
+            
+    # Step the system N times each grasshopper iteration, repeating until the frame time is used up or the system converges
+    substeps = max(1,substeps)
+    startTime = time.time()
+    while True:
+        for i in range(substeps):
+            ps.SimpleStep(goalList)
+        vSum = ps.GetvSum()
+        if vSum <= threshold or time.time() - startTime >= frameTime:
+            break
+            
+    # Set converged tag
     if vSum <= threshold:
         converged = True
     else:
@@ -95,18 +142,42 @@ def solveSystem(ps,goals,goalList,tolerance,threshold,substeps):
 if "ps" not in globals():
     ps = ks.PhysicalSystem()
     goalList = List[ks.IGoal]()
+    topologyCache = tc.TopologyCache(4)
+    previousGoals = []
     
 # Reset state
 if not Run:
-    resetSystem(ps,Goals,goalList,tolerance)
+    previousGoals = resetSystem(ps,Goals,goalList,tolerance)
+    topologyCache.clear()
     vSum = 0.0
     msg = None
+    converged = True
     
 # Run state
 else:
     
-    # Solve physical system
-    vSum,converged = solveSystem(ps,Goals,goalList,tolerance,threshold,SubSteps)
+    # Diff the goals against the previous iteration
+    goals = flattenGoals(Goals)
+    added,rebuild = diffGoals(previousGoals,goals)
+    
+    # Goals have been remade, swap in the system of a cached goal topology (appended goals join the live system)
+    if rebuild and [g for g in added if g.PIndex == None]:
+        cachedPs = warmStartSystem(ps,goals,previousGoals,topologyCache,tolerance)
+        if cachedPs is not None:
+            ps = cachedPs
+            
+        # Or solve a new topology on a fresh system, so each cached system keeps the state of its own topology
+        else:
+            ps = ks.PhysicalSystem()
+            for g in goals:
+                ps.AssignPIndex(g,tolerance)
+            
+    # Solve physical system, stepping for a short frame time while running or only SubSteps once while paused
+    frameTime = 0.0
+    if FrameRate and not Pause:
+        frameTime = min(1.0 / FrameRate,maxFrameTime)
+    vSum,converged = solveSystem(ps,goals,added,rebuild,goalList,tolerance,threshold,SubSteps,frameTime)
+    previousGoals = goals
     
     # Set component message
     msg = "Solver Running"
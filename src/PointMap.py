@@ -0,0 +1,87 @@
+﻿"""
+Tolerance aware point to index map, used for matching line/polyline end points
+to nodes in linear time instead of with list.index/IndexOf scans. Points are
+binned in a dictionary of grid cells, so it runs in both GHPython (IronPython)
+and CPython, with Rhino Point3d or (x,y,z) tuples.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import math
+
+def pointXYZ(pt):
+
+    """ Get the coordinates of a Point3d or (x,y,z) sequence """
+
+    if hasattr(pt,"X"):
+        return pt.X,pt.Y,pt.Z
+    return pt[0],pt[1],pt[2]
+
+class PointMap(object):
+
+    """ Map points to indices, points closer than tolerance share an index """
+
+    def __init__(self,tolerance,points=None):
+
+        self.tolerance = float(tolerance)
+        self.points = []
+        self._cells = {}
+        if points is not None:
+            for pt in points:
+                self.add(pt)
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cellSides(self,pt):
+
+        """ Get the grid cell of a point and the side of the cell it is nearest on each axis """
+
+        # Cells are twice the tolerance, so matches lie in the 2x2x2 cells on the near side
+        scale = 0.5 / self.tolerance
+        cell = []
+        sides = []
+        for c in pointXYZ(pt):
+            f = c * scale
+            i = int(math.floor(f))
+            cell.append(i)
+            sides.append(-1 if f - i < 0.5 else 1)
+        return tuple(cell),sides
+
+    def find(self,pt):
+
+        """ Return the index of the point within tolerance of pt, or -1 """
+
+        x,y,z = pointXYZ(pt)
+        (cx,cy,cz),(sx,sy,sz) = self._cellSides(pt)
+        tolSq = self.tolerance * self.tolerance
+        for ox in (0,sx):
+            for oy in (0,sy):
+                for oz in (0,sz):
+                    for i in self._cells.get((cx+ox,cy+oy,cz+oz),()):
+                        px,py,pz = pointXYZ(self.points[i])
+                        if (px-x)**2 + (py-y)**2 + (pz-z)**2 <= tolSq:
+                            return i
+        return -1
+
+    def index(self,pt):
+
+        """ Return the index of the point within tolerance of pt, like list.index """
+
+        i = self.find(pt)
+        if i < 0:
+            raise ValueError("Point is not in the map")
+        return i
+
+    def add(self,pt):
+
+        """ Return the index of pt, adding it if no point is within tolerance """
+
+        i = self.find(pt)
+        if i < 0:
+            i = len(self.points)
+            self.points.append(pt)
+            self._cells.setdefault(self._cellSides(pt)[0],[]).append(i)
+        return i
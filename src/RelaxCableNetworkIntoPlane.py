@@ -33,6 +33,7 @@ clr.AddReferenceToFileAndPath(gh.Folders.PluginFolder+"Components\KangarooSolver
 import KangarooSolver as ks
 import Grasshopper.Kernel.Types as gkt
 from System.Collections.Generic import List
+import PointMap as pm
 
 def castEdges(edges):
     
@@ -59,11 +60,11 @@ def openDegreeTwoNodes(cables,angle):
         vts.append(l.From)
         vts.append(l.To)
         
-    # Get valence two vertices
-    valTwoVts = []
+    # Get valence two vertices as a set, so looking up the cable start points is linear in the cable count
+    valTwoVts = set()
     for pt,n in Counter(vts).iteritems():
         if n == 2:
-            valTwoVts.append(pt)
+            valTwoVts.add(pt)
             
     # Adjust cables if start point in valence two nodes
     newCables = []
@@ -109,25 +110,19 @@ def sortPointsAroundCenter(pts,center):
     
     return sortedPts,plane
 
-def linesToGraph(lines,edgeMode):
+def linesToGraph(lines,edgeMode,tolerance=0.0000001):
     
     """ Creates a NetworkX graph from a list of lines """
     
     # Create graph
     graph = nx.Graph()
     
-    # Get line endpoints
-    endPts = []
-    for l in lines:
-        endPts.append(l.From)
-        endPts.append(l.To)
-        
-    # Remove duplicate points and sort these
-    uniquePts = list(set(endPts))
-    uniquePts.sort()
+    # Match the line endpoints with unique nodes, the tolerance is below the 1e-6 rounding of rebuildLines to keep rounded points distinct
+    nodeMap = pm.PointMap(tolerance)
+    lineNodes = [(nodeMap.add(l.From),nodeMap.add(l.To)) for l in lines]
     
     # Add nodes to graph
-    for i,pt in enumerate(uniquePts):
+    for i,pt in enumerate(nodeMap.points):
         graph.add_node(i,point=pt)
         
     # Calculate the sum of all curve lengths
@@ -135,11 +130,7 @@ def linesToGraph(lines,edgeMode):
     avrCurveLengthPrc = (sumCurveLengths/len(lines))/sumCurveLengths
     
     # Add edges using edgeMode to determine the edge weight
-    for l in lines:
-        
-        # Match the curve endpoints with the graph nodes
-        startNode = uniquePts.index(l.From)
-        endNode = uniquePts.index(l.To)
+    for l,(startNode,endNode) in zip(lines,lineNodes):
         
          # Calculate curve lenght percentage by all lines length
         lengthPrc = (l.Length/sumCurveLengths)
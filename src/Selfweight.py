@@ -0,0 +1,65 @@
+"""
+Nodal self-weight loads for bar/cable members, shared by CalibratedBeamGoals
+and CalibratedCableGoals. Uses NumPy (summing all bars per node with bincount)
+for NumPy array input, and pure Python and PointMap for anything else (e.g.
+Point3d lists in GHPython, also when NumPy is available as in Rhino 8).
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+import math
+import PointMap as pm
+try:
+    import numpy as np
+    import HeadlessSolver as hs
+except ImportError:
+    np = None
+
+# Gravitational acceleration (m/s2)
+GRAVITY = 9.82
+
+def sumNodalSelfweight(nodeCount,bars,lengths,area,rho):
+
+    """ Sum half the weight of each bar into its two nodes, returns (n,3) load vectors """
+
+    # Calculate half the weight of each bar, area and rho may be per bar arrays
+    bars = np.asarray(bars).reshape(-1,2)
+    halfWeights = np.asarray(lengths) * 0.5 * np.asarray(area) * 1e-6 * np.asarray(rho) * GRAVITY
+    halfWeights = np.broadcast_to(halfWeights,(len(bars),))
+
+    # Add the weights to the bar start and end nodes
+    loads = np.zeros((nodeCount,3))
+    loads[:,2] = -np.bincount(bars.ravel(),np.repeat(halfWeights,2),minlength=nodeCount)
+    return loads
+
+def calcNodalSelfweight(starts,ends,area,rho,tolerance=0.001):
+
+    """ Calculate the self-weight load at each unique bar end point, returns nodes and load vectors """
+
+    # Pure Python for GHPython and other non array input, loads are (x,y,z) lists
+    if np is None or not isinstance(starts,np.ndarray):
+        nodeMap = pm.PointMap(tolerance)
+        loads = []
+        for a,b in zip(starts,ends):
+            bar = (nodeMap.add(a),nodeMap.add(b))
+            while len(loads) < len(nodeMap):
+                loads.append([0.0,0.0,0.0])
+            ax,ay,az = pm.pointXYZ(a)
+            bx,by,bz = pm.pointXYZ(b)
+            length = math.sqrt((bx-ax)**2 + (by-ay)**2 + (bz-az)**2) * 0.5
+            force = length * area * 1e-6 * rho * GRAVITY
+            for i in bar:
+                loads[i][2] -= force
+        return nodeMap.points,loads
+
+    # NumPy, merge the end points of all bars and sum their weights at once
+    starts = np.asarray(starts,dtype=np.float64).reshape(-1,3)
+    ends = np.asarray(ends,dtype=np.float64).reshape(-1,3)
+    pts = np.concatenate((starts,ends))
+    nodeIds,inverse = np.unique(hs.mergePoints(pts,tolerance),return_inverse=True)
+    bars = inverse.reshape(2,-1).T
+    edges = ends - starts
+    lengths = np.sqrt(np.einsum("ij,ij->i",edges,edges))
+    return pts[nodeIds],sumNodalSelfweight(len(nodeIds),bars,lengths,area,rho)
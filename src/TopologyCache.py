@@ -0,0 +1,82 @@
+﻿"""
+Warm start cache keyed by goal topology, for reusing the particle indices and
+(converged) physical system of a recently solved goal set when only the goal
+parameters have changed, e.g. when tweaking a strength slider in Grasshopper.
+The topology fingerprint is made from the goal types and their particle
+positions rounded to the solver tolerance. Runs in both GHPython and CPython.
+    Remarks:
+        Author: Anders Holden Deleuran
+        License: Apache License 2.0
+        Version: 261018
+"""
+
+from collections import OrderedDict
+import PointMap as pm
+
+def goalFingerprint(goals,tolerance):
+
+    """ Hash the types and particle connectivity (but not the parameters) of a list of goals """
+
+    parts = []
+    scale = 1.0 / tolerance
+    for g in goals:
+        parts.append(type(g).__name__)
+        if g.PPos is None:
+            parts.append(tuple(int(i) for i in g.PIndex))
+            continue
+        for pt in g.PPos:
+            x,y,z = pm.pointXYZ(pt)
+            parts.append((int(round(x*scale)),int(round(y*scale)),int(round(z*scale))))
+    return hash(tuple(parts))
+
+class TopologyCache(object):
+
+    """ Least recently used cache of solver states keyed by goal topology """
+
+    def __init__(self,capacity=4):
+
+        self.capacity = capacity
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self,key):
+
+        """ Return the state cached for key (marking it as recently used), or None """
+
+        state = self._entries.pop(key,None)
+        if state is not None:
+            self._entries[key] = state
+        return state
+
+    def take(self,key):
+
+        """ Remove and return the state cached for key, or None """
+
+        return self._entries.pop(key,None)
+
+    def put(self,key,state):
+
+        """ Cache state for key, evicting the least recently used states above capacity """
+
+        self._entries.pop(key,None)
+        self._entries[key] = state
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+def warmStart(cache,goals,tolerance):
+
+    """ Get the system of a cached goal topology and copy its particle indices to goals, or None """
+
+    # The system is taken out of the cache while it is live, so it is only cached with its current topology
+    state = cache.take(goalFingerprint(goals,tolerance))
+    if state is None:
+        return None
+    ps,pIndices = state
+    for g,pIndex in zip(goals,pIndices):
+        g.PIndex = pIndex
+    return ps